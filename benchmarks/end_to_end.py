@@ -0,0 +1,177 @@
+"""
+This module measures complete runs of every backend: column resolution, generation and loading of a sample table.
+The rows are loaded into local stand-ins of the databases and data warehouses:
+- BigQuery rows are streamed to a fake client that only serializes them to JSON.
+- PostgreSQL rows are loaded with COPY into a local PostgreSQL server if BENCH_PG_HOST is set, otherwise with
+  pandas into SQLite.
+- MySQL rows are loaded with LOAD DATA into a local MySQL server if BENCH_MYSQL_HOST is set, otherwise with pandas
+  into SQLite.
+- Files rows are written to CSV files in a temporary folder.
+It is used by the 'run' module of the benchmarks.
+
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import pandas as pd
+
+from modules import bigqueryhelper, bigquerycolumns, bigquerystreaming, mysqlhelper, postgresqlhelper, column_plan, \
+    filesink, introspection, pipeline
+
+TABLE = "benchmark"
+
+# The columns of the sample table of every backend, with the statement creating it in a local server
+BQ_COLUMNS = [introspection.parse_type(name, data_type) for name, data_type in (
+    ("id", "INT64"), ("first_name", "STRING"), ("email", "STRING"), ("amount", "NUMERIC"), ("active", "BOOL"),
+    ("payload", "BYTES"), ("created", "TIMESTAMP"), ("day", "DATE"), ("location", "GEOGRAPHY"))]
+PG_COLUMNS = [introspection.column(*values) for values in (
+    ("id", "bigint"), ("first_name", "text"), ("email", "character varying", 100), ("amount", "numeric"),
+    ("active", "boolean"), ("payload", "bytea"), ("created", "timestamp without time zone"), ("day", "date"),
+    ("flags", "bit", 8), ("ip", "inet"))]
+PG_SCHEMA = "CREATE TABLE " + TABLE + " (id bigint, first_name text, email varchar(100), amount numeric, " \
+            "active boolean, payload bytea, created timestamp, day date, flags bit(8), ip inet)"
+MYSQL_COLUMNS = [introspection.column(*values) for values in (
+    ("id", "int"), ("first_name", "varchar", 50), ("email", "varchar", 100), ("amount", "decimal"),
+    ("active", "tinyint"), ("payload", "blob"), ("created", "datetime"), ("day", "date"), ("start_time", "time"))]
+MYSQL_SCHEMA = "CREATE TABLE " + TABLE + " (id int, first_name varchar(50), email varchar(100), " \
+               "amount decimal(38,9), active tinyint, payload blob, created datetime, day date, start_time time)"
+
+
+class FakeBigQueryClient:
+    """
+    Stands in for google.cloud.bigquery.Client when streaming rows, every insert is serialized like an API request.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.rows = 0
+
+    def insert_rows_json(self, table, rows):
+        json.dumps(rows)
+        if self.latency:
+            time.sleep(self.latency)
+        self.rows += len(rows)
+        return []
+
+
+@contextmanager
+def open_bigquery_loader(latency=0):
+    streamer = bigquerystreaming.Streamer(FakeBigQueryClient(latency), TABLE, logging.getLogger("benchmark"))
+    try:
+        yield lambda first, data: streamer.send(column_plan.to_rows(data))
+    finally:
+        streamer.close()
+
+
+@contextmanager
+def open_sqlite_loader(path):
+    # Loads the chunks with pandas into SQLite, the stand-in of the to_sql load modes
+    conn = sqlite3.connect(path)
+    try:
+        yield lambda first, data: pd.DataFrame(data).to_sql(TABLE, conn, if_exists="append", index=False)
+    finally:
+        conn.close()
+
+
+def pg_params():
+    # The connection parameters of a local PostgreSQL server, or None if BENCH_PG_HOST is not set
+    if not os.environ.get("BENCH_PG_HOST"):
+        return None
+    return {"host": os.environ["BENCH_PG_HOST"], "port": os.environ.get("BENCH_PG_PORT", "5432"),
+            "database": os.environ.get("BENCH_PG_DATABASE", "postgres"),
+            "user": os.environ.get("BENCH_PG_USER", "postgres"), "password": os.environ.get("BENCH_PG_PASSWORD", "")}
+
+
+def mysql_params():
+    # The connection parameters of a local MySQL server, or None if BENCH_MYSQL_HOST is not set
+    if not os.environ.get("BENCH_MYSQL_HOST"):
+        return None
+    return (os.environ.get("BENCH_MYSQL_USER", "root"), os.environ.get("BENCH_MYSQL_PASSWORD", ""),
+            os.environ["BENCH_MYSQL_HOST"], os.environ.get("BENCH_MYSQL_DATABASE", "benchmark"))
+
+
+def build_plan(helper, add_column, columns, table):
+    # Resolves the columns of the sample table with the 'add_column' function of a backend
+    plan = column_plan.ColumnPlan(helper)
+    for column in columns:
+        add_column(plan, column, table)
+    return plan
+
+
+def timed_run(target, plan, rows, chunk_size, loader, workers, seed):
+    # Generates and loads the rows of the sample table, returns the target, row count, duration and rows per second
+    start = time.perf_counter()
+    loaded = pipeline.run(plan, rows, chunk_size, loader, workers, seed)
+    seconds = time.perf_counter() - start
+    return {"target": target, "rows": loaded, "seconds": seconds, "rows_per_sec": loaded / seconds}
+
+
+def bench_bigquery(rows, chunk_size, workers, seed, work_dir, latency=0):
+    plan = build_plan(bigqueryhelper, bigquerycolumns.add_column, BQ_COLUMNS, "benchmark." + TABLE)
+    return timed_run("fake BigQuery client", plan, rows, chunk_size, partial(open_bigquery_loader, latency), workers,
+                     seed)
+
+
+def bench_postgresql(rows, chunk_size, workers, seed, work_dir):
+    from modules import postgresql
+
+    plan = build_plan(postgresqlhelper, postgresql.add_column, PG_COLUMNS, "benchmark." + TABLE)
+    params = pg_params()
+    if params is None:
+        path = os.path.join(work_dir, "postgresql.db")
+        return timed_run("sqlite", plan, rows, chunk_size, partial(open_sqlite_loader, path), workers, seed)
+
+    import psycopg2
+
+    conn = psycopg2.connect(**params)
+    with conn, conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS " + TABLE)
+        cur.execute(PG_SCHEMA)
+    conn.close()
+    return timed_run("postgresql", plan, rows, chunk_size, partial(postgresql.open_loader, params, TABLE, "copy"),
+                     workers, seed)
+
+
+def bench_mysql(rows, chunk_size, workers, seed, work_dir):
+    from modules import mysql_dg
+
+    plan = build_plan(mysqlhelper, mysql_dg.add_column, MYSQL_COLUMNS, "benchmark." + TABLE)
+    params = mysql_params()
+    if params is None:
+        path = os.path.join(work_dir, "mysql.db")
+        return timed_run("sqlite", plan, rows, chunk_size, partial(open_sqlite_loader, path), workers, seed)
+
+    import mysql.connector
+
+    user_id, password_id, host_id, database_id = params
+    cnx = mysql.connector.connect(user=user_id, password=password_id, host=host_id, database=database_id)
+    cursor = cnx.cursor()
+    cursor.execute("DROP TABLE IF EXISTS " + TABLE)
+    cursor.execute(MYSQL_SCHEMA)
+    cnx.close()
+    loader = partial(mysql_dg.open_loader, user_id, password_id, host_id, database_id, TABLE, "load_data", 1000)
+    return timed_run("mysql", plan, rows, chunk_size, loader, workers, seed)
+
+
+def bench_files(rows, chunk_size, workers, seed, work_dir):
+    plan = build_plan(bigqueryhelper, bigquerycolumns.add_column, BQ_COLUMNS, "files." + TABLE)
+    loader = partial(filesink.open_loader, os.path.join(work_dir, TABLE), "csv", "", 0)
+    return timed_run("csv files", plan, rows, chunk_size, loader, workers, seed)
+
+
+BACKENDS = {"bigquery": bench_bigquery, "postgresql": bench_postgresql, "mysql": bench_mysql, "files": bench_files}
+
+
+def run(rows=100000, chunk_size=10000, workers=1, seed=0, backends=tuple(BACKENDS)):
+    # Returns the result of a complete run of every backend, by backend name
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for backend in backends:
+            results[backend] = BACKENDS[backend](rows, chunk_size, workers, seed, work_dir)
+    return results
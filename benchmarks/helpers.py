@@ -0,0 +1,62 @@
+"""
+This module measures the rows per second generated by every function of the 'bigqueryhelper', 'mysqlhelper' and
+'postgresqlhelper' modules, and by the Faker functions resolved from column names with and without value pools.
+Every function is timed through a column plan, as it is called when generating a table.
+It is used by the 'run' module of the benchmarks.
+
+"""
+import inspect
+import time
+
+from modules import bigqueryhelper, mysqlhelper, postgresqlhelper, column_plan
+
+HELPERS = (bigqueryhelper, mysqlhelper, postgresqlhelper)
+# Functions that do not generate column values
+SKIPPED = ("seed", "find_faker_func", "fake_data", "get_str", "decimal_values")
+# Arguments of the functions that need them
+ARGS = {"int_range": (-32768, 32768), "bit": (8,), "lat_lng": ("latitude",)}
+# Column names resolved to Faker functions by the helper modules
+FAKER_COLUMNS = ("first_name", "email", "city", "company", "address")
+
+
+def helper_functions(helper):
+    # Returns the names of the functions of a helper module that generate column values
+    return [name for name, func in inspect.getmembers(helper, inspect.isfunction)
+            if func.__module__ == helper.__name__ and name not in SKIPPED]
+
+
+def rows_per_second(plan, rows, repeat):
+    # Returns the best rate of 'repeat' runs generating 'rows' rows with the plan
+    plan.generate(0, min(rows, 100))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plan.generate(0, rows)
+        best = min(best, time.perf_counter() - start)
+    return rows / best if best else float("inf")
+
+
+def bench_function(helper, generator, args=(), rows=10000, repeat=3, pool_size=0):
+    plan = column_plan.ColumnPlan(helper, pool_size=pool_size)
+    plan.add("column", generator, *args)
+    return rows_per_second(plan, rows, repeat)
+
+
+def run(rows=10000, repeat=3, seed=0):
+    """
+    Returns the rows per second of every function of every helper module, by module and function name.
+    Faker functions resolved from column names are reported as 'faker:<column>' and, sampled from a pool of 1000
+    values, as 'faker_pool:<column>'.
+    """
+    results = {}
+    for helper in HELPERS:
+        helper.seed(seed)
+        results[helper.__name__.split(".")[-1]] = result = {}
+        for name in helper_functions(helper):
+            result[name] = bench_function(helper, name, ARGS.get(name, ()), rows, repeat)
+        for col_name in FAKER_COLUMNS:
+            provider = helper.find_faker_func(col_name)
+            result["faker:" + col_name] = bench_function(helper, column_plan.FAKER, (provider,), rows, repeat)
+            result["faker_pool:" + col_name] = bench_function(helper, column_plan.FAKER, (provider,), rows, repeat,
+                                                              pool_size=1000)
+    return results
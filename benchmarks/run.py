@@ -0,0 +1,65 @@
+"""
+This is the main module of the benchmarks.
+It measures the helper functions and complete runs of every backend and writes the results to a JSON file, so that
+the results of two versions of the project can be compared.
+Run it from the main folder with: python -m benchmarks.run
+For more information, see the section on Benchmarks in README.md
+
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+from benchmarks import end_to_end, helpers
+from config.definitions import ROOT_DIR
+
+
+def commit():
+    # Returns the commit of the benchmarked version, or None outside of a git repository
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (Exception,):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the data generation helpers and backends.")
+    parser.add_argument("--rows", type=int, default=10000, help="rows generated per helper function")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every helper function, the best is kept")
+    parser.add_argument("--e2e-rows", type=int, default=100000, help="rows generated per backend")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", nargs="*", default=list(end_to_end.BACKENDS),
+                        choices=list(end_to_end.BACKENDS))
+    parser.add_argument("--skip-helpers", action="store_true")
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "benchmarks", "results.json"))
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "rows": args.rows,
+        "e2e_rows": args.e2e_rows,
+        "chunk_size": args.chunk_size,
+        "workers": args.workers,
+    }
+    if not args.skip_helpers:
+        results["helpers"] = helpers.run(args.rows, args.repeat, args.seed)
+    results["end_to_end"] = end_to_end.run(args.e2e_rows, args.chunk_size, args.workers, args.seed, args.backends)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=1)
+
+    for backend, result in results["end_to_end"].items():
+        print(backend + " (" + result["target"] + "): " + str(round(result["rows_per_sec"])) + " rows/sec")
+    print("Results were written to " + args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,17 @@ BIGINT_RANGE = 9223372036854775808
 NUMERIC_RANGE = 9.9999999999999999999999999999999999999E+28
 INT_RANGE_MYSQL = 2147483647
 PG_INT_RANGE = 2147483648
+CHUNK_SIZE = 10000  # This is the number of rows generated and loaded together
 LOCALE = "en_IN"  # This is the locale value to be used with the 'Faker' library. For supported locales, see Faker docs.
 TZ_INFO = "Asia/Kolkata"  # This is the timezone that will be used in "timestamptz" values for PostgreSQL
+# This is the range of generated dates, times and timestamps (ISO 8601). The bounds are fixed dates rather than "now",
+# so that a run repeated or resumed with the same seed generates the same values
+DATE_RANGE = ("1970-01-01", "2025-12-31")
+POINT_JITTER = 0  # This is the maximum offset in degrees added to generated points, 0 keeps the land locations
+BINARY_LENGTHS = (1, 32)  # This is the range of the lengths in bytes of binary values, up to the column length
 GBQ = "Google BigQuery"
 MYSQL = "MySQL"
 PGSQL = "PostgreSQL"
+FILES = "Files"
 CANNOT_BE_EVALUATED_ERROR = "Cannot be evaluated for data generation. You may attempt to rename column. For more " \
                             "information, see Google BigQuery limitations in README.md"
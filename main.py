@@ -1,47 +1,78 @@
 """
 This is the main module of data generation.
 It checks for the presence of supported data warehouse and databases configuration and executes the required submodules.
+The configured submodules target independent systems, so each of them runs at the same time in its own process.
+A submodule (and its helper module and dependencies) is only imported by the process of its section.
 
 """
 
+import multiprocessing
 import os
+import sys
 import traceback
+from importlib import import_module
 
-from config.definitions import ROOT_DIR, GBQ, PGSQL, MYSQL
+from config.definitions import ROOT_DIR, GBQ, PGSQL, MYSQL, FILES
 from configparser import ConfigParser, MissingSectionHeaderError
-from modules import bigquery, mysql_dg, postgresql, logging_module, exit_messages
-
-configParser = ConfigParser()
-configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
-errors = False
-
-# Set up a logger for the main module
-main_logger = logging_module.setup_logger('main_logger', 'main.log', 'DEBUG')
-main_logger.info("Data generation program has begun.")
-
-try:
-    configParser.read_file(open(configfilepath))
-except MissingSectionHeaderError:
-    main_logger.critical("No sections detected. Program has been terminated.")
-    exit_messages.error_exit()
-
-except (Exception,):
-    main_logger.critical("An error occurred while reading the config file: "+traceback.format_exc())
-    exit_messages.error_exit()
-
-# Run the bigquery module if 'Google BigQuery' configuration is present/added in the config file
-if configParser.has_section(GBQ):
-    errors = bigquery.main()
-
-# Run the mysql module if 'MySQL' configuration is present/added in the config file
-if configParser.has_section(MYSQL):
-    errors = True if mysql_dg.main() else errors
-
-# Run the postgresql module if 'PostgreSQL' configuration is present/added in the config file
-if configParser.has_section(PGSQL):
-    errors = True if postgresql.main() else errors
-
-if errors:
-    exit_messages.warning_exit()
-else:
-    exit_messages.success_exit()
+from modules import logging_module, exit_messages
+
+# The name of the submodule run for every section of the config file
+BACKENDS = {GBQ: "bigquery", MYSQL: "mysql_dg", PGSQL: "postgresql", FILES: "filesink"}
+# Exit code of a submodule that finished but raised some errors, critical errors exit with 1 (see 'exit_messages')
+WARNINGS_EXIT_CODE = 2
+
+
+def run_backend(section):
+    # Runs the submodule of a section in a child process and reports its result through the exit code
+    backend = import_module("modules." + BACKENDS[section])
+    sys.exit(WARNINGS_EXIT_CODE if backend.main() else 0)
+
+
+def main():
+    configParser = ConfigParser()
+    configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
+
+    # Set up a logger for the main module
+    main_logger = logging_module.setup_logger('main_logger', 'main.log', 'DEBUG')
+    main_logger.info("Data generation program has begun.")
+
+    try:
+        configParser.read_file(open(configfilepath))
+    except MissingSectionHeaderError:
+        main_logger.critical("No sections detected. Program has been terminated.")
+        exit_messages.error_exit()
+
+    except (Exception,):
+        main_logger.critical("An error occurred while reading the config file: "+traceback.format_exc())
+        exit_messages.error_exit()
+
+    # Run the submodule of every section present/added in the config file, all at the same time
+    processes = {}
+    for section in BACKENDS:
+        if configParser.has_section(section):
+            main_logger.info("Starting data generation for " + section + ".")
+            processes[section] = multiprocessing.Process(target=run_backend, args=(section,), name=section)
+            processes[section].start()
+
+    errors, failed = False, []
+    for section, process in processes.items():
+        process.join()
+        if process.exitcode == 0:
+            main_logger.info("Data generation for " + section + " has finished without errors.")
+        elif process.exitcode == WARNINGS_EXIT_CODE:
+            main_logger.warning("Data generation for " + section + " has finished but some errors were raised.")
+            errors = True
+        else:
+            main_logger.critical("Data generation for " + section + " was terminated due to a critical error.")
+            failed.append(section)
+
+    if failed:
+        exit_messages.error_exit()
+    elif errors:
+        exit_messages.warning_exit()
+    else:
+        exit_messages.success_exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,26 +5,109 @@ For more information, see the section on BigQuery in README.md
 
 """
 import os
-import re
-import time
 import traceback
 
-import pandas as pd
 from configparser import ConfigParser
+from contextlib import contextmanager
+from functools import partial
 
 from google.api_core.exceptions import BadRequest
 from google.cloud import bigquery
 from google.oauth2 import service_account
 
-from config.definitions import ROOT_DIR, GBQ
-from modules import bigqueryhelper, logging_module, exit_messages
-from modules.data_generation_exceptions import tableDoesNotExist, cannotBeEvaluated
+from config.definitions import ROOT_DIR, GBQ, CHUNK_SIZE
+from modules import bigqueryhelper, bigquerycolumns, bigquerystaging, bigquerystreaming, column_plan, faker_index, \
+    introspection, pipeline, uniqueness, logging_module, exit_messages
+from modules.checkpoint import checkpoint_path, open_checkpoint
+from modules.data_generation_exceptions import tableDoesNotExist, cannotBeEvaluated, rowsNotStreamed
+from modules.metrics import Metrics
 
 bqh = bigqueryhelper
 configParser = ConfigParser()
 
+# The staging file writers and source formats of the load methods using BigQuery load jobs
+STAGING_FORMATS = {
+    "parquet": (bigquerystaging.write_parquet, bigquery.SourceFormat.PARQUET),
+    "avro": (bigquerystaging.write_avro, bigquery.SourceFormat.AVRO),
+}
+
+
+@contextmanager
+def open_loader(json_file_path, project_id, dataset_id, table_id, streaming, stream_options, load_method="gbq",
+                staging_dir=None, keep_files=False):
+    # Sets up the loading of generated chunks into the table, every worker process sets up its own client
+    credentials = service_account.Credentials.from_service_account_file(json_file_path)
+    full_table_name = project_id + "." + dataset_id + "." + table_id
+
+    if not streaming and load_method in STAGING_FORMATS:
+        write_file, source_format = STAGING_FORMATS[load_method]
+        client = bigquery.Client(credentials=credentials, project=project_id)
+        fields = client.get_table(full_table_name).schema
+        job_config = bigquery.LoadJobConfig(source_format=source_format, use_avro_logical_types=True,
+                                            write_disposition=bigquery.WriteDisposition.WRITE_APPEND)
+        os.makedirs(staging_dir, exist_ok=True)
+
+        def load_chunk(first, data):
+            # Write the chunk to a local staging file with the types of the table and load it with a load job
+            path = os.path.join(staging_dir, table_id + "_" + str(first) + "." + load_method)
+            write_file(path, data, fields)
+            with open(path, "rb") as file:
+                client.load_table_from_file(file, full_table_name, job_config=job_config).result()
+            if not keep_files:
+                os.remove(path)
+
+        try:
+            yield load_chunk
+        finally:
+            client.close()
+        return
+
+    if not streaming:
+        import pandas as pd
+
+        def load_chunk(first, data):
+            # Create a dataframe from the columns generated by the plan and load it to BigQuery using pandas_gbq
+            rows_to_insert = pd.DataFrame(data)
+            rows_to_insert.to_gbq(dataset_id + "." + table_id, project_id, progress_bar=True,
+                                  if_exists='append', credentials=credentials)  # Make an API request.
+
+        yield load_chunk
+        return
+
+    bigquery_logger = logging_module.get_logger('bigquery_logger', 'bigquery.log')
+    client = bigquery.Client(credentials=credentials, project=project_id)
+    streamer = bigquerystreaming.Streamer(client, full_table_name, bigquery_logger, **stream_options)
+
+    def load_chunk(first, data):
+        # Stream the rows of the chunk in micro-batches at the rate requested by user
+        failed = streamer.failed
+        streamer.send(column_plan.to_rows(data))
+        # Wait for the last batches of the chunk, so that the chunk is streamed once it can be checkpointed
+        streamer.flush()
+        # A chunk with rows that could not be streamed is not checkpointed, so that a resumed run streams it again
+        if streamer.failed > failed:
+            raise rowsNotStreamed(streamer.failed - failed, first)
+
+    try:
+        yield load_chunk
+    finally:
+        streamer.close()
+        client.close()
+
+
+def fetch_columns(client, project_id, dataset_id, table_id):
+    # Fetches the name, data type and nullability of every field in a single query
+    query_job = client.query("""
+       SELECT column_name, data_type, is_nullable
+       FROM """ + project_id + """.""" + dataset_id + """.INFORMATION_SCHEMA.COLUMNS
+        where table_name = '""" + table_id + """'
+        ORDER BY ordinal_position
+        """)
+    return [introspection.parse_type(row.column_name, row.data_type, row.is_nullable) for row in query_job.result()]
+
+
 def main():
-    col_name, rows_to_insert, results, credentials = [], [], None, None
+    credentials = None
     errors_raised = False
 
     # Set up a logger for the bigquery module
@@ -44,7 +127,25 @@ def main():
     n_record = int(configParser.get(GBQ, 'RecordCount'))
     schema = configParser.get(GBQ, 'Schema')
     streaming = int(configParser.get(GBQ, 'Streaming'))
-    delay = int(configParser.get(GBQ, 'Delay'))
+    delay = float(configParser.get(GBQ, 'Delay') or 0)
+    stream_options = {
+        "batch_size": int(configParser.get(GBQ, 'StreamBatchSize', fallback='') or 500),
+        # Without a rate, the delay between rows of previous versions is used
+        "rate": float(configParser.get(GBQ, 'RowsPerSecond', fallback='') or (1 / delay if delay else 0)),
+        "max_in_flight": int(configParser.get(GBQ, 'MaxInFlight', fallback='') or 4),
+        "max_retries": int(configParser.get(GBQ, 'MaxRetries', fallback='') or 3),
+    }
+    load_method = (configParser.get(GBQ, 'LoadMethod', fallback='') or "gbq").lower()
+    staging_dir = os.path.join(ROOT_DIR, 'files', configParser.get(GBQ, 'StagingDir', fallback='') or 'staging')
+    keep_files = configParser.get(GBQ, 'KeepStagingFiles', fallback='0') == '1'
+    chunk_size = int(configParser.get(GBQ, 'ChunkSize', fallback='') or CHUNK_SIZE)
+    workers = int(configParser.get(GBQ, 'Workers', fallback='') or 1)
+    queue_depth = int(configParser.get(GBQ, 'QueueDepth', fallback='') or 2)
+    load_workers = int(configParser.get(GBQ, 'LoadWorkers', fallback='') or 1)
+    seed = int(configParser.get(GBQ, 'Seed', fallback='') or pipeline.new_seed())
+    pool_size = int(configParser.get(GBQ, 'FakerPoolSize', fallback='') or 0)
+    pool_refresh = int(configParser.get(GBQ, 'FakerPoolRefresh', fallback='') or 0)
+    unique_columns = uniqueness.parse(configParser.get(GBQ, 'UniqueColumns', fallback=''))
     loglevel = configParser.get(GBQ, 'LogLevel')
 
     full_table_name = project_id + "." + dataset_id + "." + table_id
@@ -54,142 +155,100 @@ def main():
         bigquery_logger = logging_module.set_logging_level(bigquery_logger, loglevel)
 
     bigquery_logger.info("Entered BigQuery module: Data Generation Process for BigQuery has begun.")
+    metrics = Metrics("bigquery", 'bigquery_logger', 'bigquery.log')
 
-    try:
-        credentials = service_account.Credentials.from_service_account_file(
-            json_file_path)
-    except(Exception,):
-        bigquery_logger.critical("An error has occurred while reading the service account key file: " + traceback.
-                                 format_exc())
-        exit_messages.error_exit()
-
-    # Set up BigQuery client
-    client = bigquery.Client(credentials=credentials, project=project_id)
+    # Start a checkpoint file recording the committed chunks, or continue the run of the previous checkpoint file
+    resume = configParser.get(GBQ, 'Resume', fallback='0') == '1'
+    checkpoint = open_checkpoint(checkpoint_path("bigquery", full_table_name), resume, seed, chunk_size,
+                                 bigquery_logger).of(table_id)
+    seed, chunk_size = checkpoint.seed, checkpoint.chunk_size
+    # The checkpoint of the table always holds the table, a run is only resumed if some of its rows were committed
+    resumed = checkpoint.rows(table_id) > 0
 
-    # Create/replace the table according to the schema entered by the user if schema is not empty
-    if schema != "":
-        job = client.query(schema)
+    with metrics.phase("connect"):
         try:
-            job.result()
-            bigquery_logger.debug("Creating schema according to config file was successful.")
-        except BadRequest as e:
-            bigquery_logger.critical("ERROR while creating schema from config file: {}".format(e.args[0]))
+            credentials = service_account.Credentials.from_service_account_file(
+                json_file_path)
+        except(Exception,):
+            bigquery_logger.critical("An error has occurred while reading the service account key file: " + traceback.
+                                     format_exc())
             exit_messages.error_exit()
 
-    # Fetch the fields from the newly created/replaced table or using the table_id key
-    query_job = client.query("""
-       SELECT column_name 
-       FROM """ + project_id + """.""" + dataset_id + """.INFORMATION_SCHEMA.COLUMNS
-        where table_name = '""" + table_id + """'
-        """)
-    try:
-        results = query_job.result()
-    except BadRequest as e:
-        bigquery_logger.critical("ERROR: {}".format(e.args[0]))
-        exit_messages.error_exit()
+        # Set up BigQuery client
+        client = bigquery.Client(credentials=credentials, project=project_id)
 
-    if results.total_rows == 0:
+    # Create/replace the table according to the schema entered by the user if schema is not empty
+    # A resumed run keeps the table and the rows committed by the previous run
+    if resumed and schema != "":
+        bigquery_logger.info("The table schema is not created when a run is resumed.")
+    elif schema != "":
+        with metrics.phase("schema"):
+            job = client.query(schema)
+            try:
+                job.result()
+                bigquery_logger.debug("Creating schema according to config file was successful.")
+            except BadRequest as e:
+                bigquery_logger.critical("ERROR while creating schema from config file: {}".format(e.args[0]))
+                exit_messages.error_exit()
+
+    # Fetch the columns from the newly created/replaced table or using the table_id key, or from the local cache
+    with metrics.phase("introspection"):
+        columns = None
+        if configParser.get(GBQ, 'SchemaCache', fallback='0') == '1' and schema == "":
+            columns = introspection.load("bigquery", full_table_name)
+
+        if columns is None:
+            try:
+                columns = fetch_columns(client, project_id, dataset_id, table_id)
+            except BadRequest as e:
+                bigquery_logger.critical("ERROR: {}".format(e.args[0]))
+                exit_messages.error_exit()
+            if columns:
+                introspection.store("bigquery", full_table_name, columns)
+
+    if not columns:
         try:
             raise tableDoesNotExist(full_table_name)
         except tableDoesNotExist as e:
             bigquery_logger.critical(e.message)
             exit_messages.error_exit()
 
-    for row in results:
-        col_name.append(row.column_name)
-
     bigquery_logger.debug("Fetching the relevant functions from the 'bigqueryhelper' module...")
-    funcs = {}
-    # Fill the "funcs" dictionary with the 'bigqueryhelper' functions according to field names
-    for _ in range(len(col_name)):
-        col_name1 = col_name[_].lower()
-        if 'id' in col_name1:
-            funcs[col_name1] = "id"
-
-        elif 'latitude' in col_name1:
-            funcs[col_name1] = "latitude"
-
-        elif 'longitude' in col_name1:
-            funcs[col_name1] = "longitude"
-
-        elif 'geography' in col_name1 or 'geometry' in col_name1 or 'point' in col_name1:
-            funcs[col_name1] = "point_data"
-
-        elif 'int' in col_name1:
-            funcs[col_name1] = "integer"
-
-        elif re.match(r"\w*big_*numeric\w*", col_name1) or re.match(r"\w*big_*decimal\w*", col_name1):
-            funcs[col_name1] = "big_num_"
-
-        elif 'numeric' in col_name1 or 'decimal' in col_name1:
-            funcs[col_name1] = "numeric"
-
-        elif 'float' in col_name1:
-            funcs[col_name1] = "float_value"
-
-        elif re.match(r"\w*date_*time\w*", col_name1) or re.match(r"\w*time_*stamp\w*", col_name1):
-            funcs[col_name1] = "date_time_"
-
-        elif 'time' in col_name1 and 'timestamp' not in col_name1:
-            funcs[col_name1] = "time_value"
-
-        elif 'bool' in col_name1:
-            funcs[col_name1] = "boolean_data"
-
-        elif 'string' in col_name1 or 'text' in col_name1:
-            funcs[col_name1] = "text"
-
-        elif 'bytes' in col_name1:
-            funcs[col_name1] = "bytes_value"
-
-        elif 'mobile' in col_name1 or 'phone' in col_name1:
-            funcs[col_name1] = "mobile"
-
-        else:
+    with metrics.phase("resolution"):
+        plan = column_plan.ColumnPlan(bqh, pool_size=pool_size, pool_refresh=pool_refresh,
+                                      unique=uniqueness.limits(columns, unique_columns, table_id))
+        # Compile the 'bigqueryhelper' functions for every field into the plan according to the field types
+        for column in columns:
             try:
-                funcs[col_name1] = [bqh.find_faker_func(col_name1)]
+                uniqueness.check(column, unique_columns, table_id, n_record)
+                bigquerycolumns.add_column(plan, column, full_table_name)
             except cannotBeEvaluated as e:
                 bigquery_logger.error(e.message)
                 errors_raised = True
 
-    # Generate rows for target table by evaluating the 'bigqueryhelper' functions
-    bigquery_logger.debug("Evaluating 'bigqueryhelper' functions to generate data...")
-    rows = []
-    for i in range(n_record):
-        data = {}
-        for j in funcs.keys():
-            if funcs[j] == "id":
-                data[j] = i
-            elif isinstance(funcs[j], list):
-                data[j] = bqh.fake_data(funcs[j][0])
-            else:
-                data[j] = eval("bqh." + funcs[j] + "()")
-            rows_to_insert = [data] if streaming else data
-
-        if streaming:
-            # Stream a single row in BigQuery with the delay as requested by user
-            try:
-                client.insert_rows_json(full_table_name, rows_to_insert)
-            except(Exception,):
-                bigquery_logger.error("There was an error while streaming row to BigQuery: " + traceback.format_exc())
-            time.sleep(delay)
-        else:
-            # Keep appending the rows together
-            rows.append(rows_to_insert)
+        faker_index.save()
 
-    if not streaming:
-        bigquery_logger.debug("Data generation complete (for batch-loading)!")
-        # Create a dataframe from the list "rows"
-        rows_to_insert = pd.DataFrame(rows)
+    # Generate rows for target table in chunks using the compiled plan and stream, batch-load or stage every chunk
+    bigquery_logger.debug("Evaluating 'bigqueryhelper' functions to generate data...")
+    bigquery_logger.info("Generating data with " + str(workers) + " worker(s) and seed " + str(seed) + ".")
+    if resumed:
+        bigquery_logger.info(str(checkpoint.rows(table_id)) + " rows were committed by the previous run and are "
+                             "skipped.")
+    loader = partial(open_loader, json_file_path, project_id, dataset_id, table_id, streaming, stream_options,
+                     load_method, staging_dir, keep_files)
+    try:
+        with metrics.phase("pipeline"):
+            pipeline.run(plan, n_record, chunk_size, loader, workers, seed, metrics, queue_depth, load_workers,
+                         checkpoint)
+    except(Exception,):
+        bigquery_logger.error("There was an error while batch-loading data to Google BigQuery: " + traceback.
+                              format_exc())
+        bigquery_logger.error("Set Resume=1 to continue the run from the checkpoint file " + checkpoint.path + ".")
+        exit_messages.error_exit()
+    checkpoint.remove()
 
-        # Load the DataFrame to BigQuery table using pandas_gbq
-        try:
-            rows_to_insert.to_gbq(dataset_id + "." + table_id, project_id, progress_bar=True,
-                                  if_exists='append', credentials=credentials)  # Make an API request.
-        except(Exception,):
-            bigquery_logger.error("There was an error while batch-loading data to Google BigQuery: " + traceback.
-                                  format_exc())
-            exit_messages.error_exit()
+    bigquery_logger.debug("Data generation complete!")
+    metrics.write()
 
     bigquery_logger.debug("Data generation process for Google BigQuery is now complete!")
     return errors_raised
@@ -0,0 +1,119 @@
+"""
+This module chooses the 'bigqueryhelper' function that generates every column of a BigQuery table.
+Columns are resolved from their BigQuery data types first and from their names otherwise. It does not depend on the
+BigQuery client, so it is also used by the 'filesink' module for columns declared in the config file.
+
+"""
+import re
+
+from modules import bigqueryhelper, column_plan, faker_index
+from modules.data_generation_exceptions import cannotBeEvaluated
+
+bqh = bigqueryhelper
+
+# The 'bigqueryhelper' functions for the data types of BigQuery fields
+TYPE_FUNCS = {
+    "int64": "integer",
+    "float64": "float_value",
+    "numeric": "numeric",
+    "bignumeric": "big_num_",
+    "bool": "boolean_data",
+    "date": "date_value",
+    "time": "time_value",
+    "datetime": "date_time_",
+    "timestamp": "date_time_",
+    "geography": "point_data",
+}
+NUMERIC_TYPES = ("float64", "numeric", "bignumeric")
+
+
+def add_column(plan, column, table):
+    # Adds the 'bigqueryhelper' function for a field to the plan according to its data type and its name
+    col_name1 = column.name.lower()
+    data_type = column.data_type
+
+    if data_type == "int64" and 'id' in col_name1:
+        plan.add(col_name1, column_plan.ID, 0)
+
+    elif data_type in NUMERIC_TYPES and ('latitude' in col_name1 or 'longitude' in col_name1):
+        plan.add(col_name1, "latitude" if 'latitude' in col_name1 else "longitude")
+
+    elif data_type == "json":
+        plan.add(col_name1, column_plan.FAKER, "json")
+
+    elif data_type in ("numeric", "bignumeric"):
+        plan.add(col_name1, TYPE_FUNCS[data_type], column.precision, column.scale)
+
+    elif data_type in TYPE_FUNCS:
+        plan.add(col_name1, TYPE_FUNCS[data_type])
+
+    elif data_type == "bytes":
+        plan.add(col_name1, "bytes_value", column.length)
+
+    elif data_type == "string":
+        if 'mobile' in col_name1 or 'phone' in col_name1:
+            plan.add(col_name1, "mobile", column.length)
+        elif 'text' in col_name1 or 'string' in col_name1:
+            # Text columns are generated in bulk, see the 'text_engine' module
+            plan.add(col_name1, "text", column.length)
+        else:
+            try:
+                faker_func = bqh.find_faker_func(col_name1, table)
+            except cannotBeEvaluated:
+                faker_func = None
+            if faker_func is None or faker_func in faker_index.LOREM_PROVIDERS:
+                plan.add(col_name1, "text", column.length)
+            else:
+                plan.add(col_name1, column_plan.FAKER, faker_func, column.length)
+
+    else:
+        add_column_by_name(plan, column, table)
+
+
+def add_column_by_name(plan, column, table):
+    # Adds the 'bigqueryhelper' function for a field of an unsupported data type according to the field name
+    col_name1 = column.name.lower()
+    if 'id' in col_name1:
+        plan.add(col_name1, column_plan.ID, 0)
+
+    elif 'latitude' in col_name1:
+        plan.add(col_name1, "latitude")
+
+    elif 'longitude' in col_name1:
+        plan.add(col_name1, "longitude")
+
+    elif 'geography' in col_name1 or 'geometry' in col_name1 or 'point' in col_name1:
+        plan.add(col_name1, "point_data")
+
+    elif 'int' in col_name1:
+        plan.add(col_name1, "integer")
+
+    elif re.match(r"\w*big_*numeric\w*", col_name1) or re.match(r"\w*big_*decimal\w*", col_name1):
+        plan.add(col_name1, "big_num_")
+
+    elif 'numeric' in col_name1 or 'decimal' in col_name1:
+        plan.add(col_name1, "numeric")
+
+    elif 'float' in col_name1:
+        plan.add(col_name1, "float_value")
+
+    elif re.match(r"\w*date_*time\w*", col_name1) or re.match(r"\w*time_*stamp\w*", col_name1):
+        plan.add(col_name1, "date_time_")
+
+    elif 'time' in col_name1 and 'timestamp' not in col_name1:
+        plan.add(col_name1, "time_value")
+
+    elif 'bool' in col_name1:
+        plan.add(col_name1, "boolean_data")
+
+    elif 'string' in col_name1 or 'text' in col_name1:
+        plan.add(col_name1, "text", column.length)
+
+    elif 'bytes' in col_name1:
+        plan.add(col_name1, "bytes_value")
+
+    elif 'mobile' in col_name1 or 'phone' in col_name1:
+        plan.add(col_name1, "mobile", column.length)
+
+    else:
+        plan.add(col_name1, column_plan.FAKER, bqh.find_faker_func(col_name1, table), column.length)
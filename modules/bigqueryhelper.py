@@ -5,40 +5,69 @@ For more information, see the section on BigQuery in README.md
 
 """
 import random as r
-import base64
-from shapely.geometry import Point
-from faker import Faker
-from datetime import time
+import numpy as np
 from config.definitions import BIGNUMERIC_RANGE, INT_RANGE, NUMERIC_RANGE, LOCALE
+from modules import binary, faker_index, geo, temporal, text_engine
+from modules.faker_context import fake
 from modules.data_generation_exceptions import cannotBeEvaluated
 
-fake = Faker(locale=LOCALE)
-Faker.seed()
+rng = np.random.default_rng()
 
 
-def big_num_():
-    return r.uniform(-BIGNUMERIC_RANGE, BIGNUMERIC_RANGE)
+def seed(value):
+    # Seeds the shared Faker instance and the random generators used by this module
+    global rng
+    fake.seed_instance(value)
+    r.seed(value)
+    rng = np.random.default_rng(value)
 
 
-def integer():
-    return int(r.uniform(-INT_RANGE, INT_RANGE))
+# The numeric functions below return a single value when called without arguments and a whole column
+# (a NumPy array of n values) when called with a row count, e.g. integer(1000)
 
 
-def numeric():
-    return r.uniform(-NUMERIC_RANGE, NUMERIC_RANGE)
+def decimal_values(default_range, precision, scale, n=None):
+    # Returns values of a DECIMAL(precision, scale) column, or values in default_range if the precision is not declared
+    bound = default_range if precision is None else 10 ** (precision - (scale or 0))
+    values = rng.uniform(-bound, bound, 1 if n is None else n)
+    if precision is not None:
+        # Values are cut to scale decimals toward zero, so that no value is rounded up to the bound
+        values = np.trunc(values * 10 ** (scale or 0)) / 10 ** (scale or 0)
+    return float(values[0]) if n is None else values
 
 
-def float_value():
-    return float(r.random())
+def big_num_(precision=None, scale=None, n=None):
+    return decimal_values(BIGNUMERIC_RANGE, precision, scale, n)
 
 
-def time_value():
-    values = list(map(int, fake.time().split(":")))
-    return time(values[0], values[1], values[2])
+def integer(n=None):
+    if n is None:
+        return int(r.uniform(-INT_RANGE, INT_RANGE))
+    return rng.integers(-INT_RANGE, INT_RANGE, n, dtype=np.int64)
 
 
-def text():
-    return fake.text()
+def numeric(precision=None, scale=None, n=None):
+    return decimal_values(NUMERIC_RANGE, precision, scale, n)
+
+
+def float_value(n=None):
+    if n is None:
+        return float(r.random())
+    return rng.random(n)
+
+
+def time_value(n=None):
+    # Times of day, see the 'temporal' module
+    if n is None:
+        return temporal.times(rng, 1)[0]
+    return temporal.times(rng, n)
+
+
+def text(max_chars=None, n=None):
+    # Sentences of up to max_chars characters, see the 'text_engine' module
+    if n is None:
+        return text_engine.sentences(rng, 1, max_chars)[0]
+    return text_engine.sentences(rng, n, max_chars)
 
 
 def latitude():
@@ -49,34 +78,50 @@ def longitude():
     return float(fake.longitude())
 
 
-def bytes_value():
-    byte_ch = base64.b64encode(bytes(str(eval("fake.binary")), 'utf-8'))
-    return byte_ch.decode('utf-8')
+def bytes_value(max_length=None, n=None):
+    # Random BYTES values in base64, as expected by BigQuery, see the 'binary' module
+    if n is None:
+        return binary.values(rng, 1, max_length).base64()[0]
+    return binary.values(rng, n, max_length).base64()
+
+
+def date_value(n=None):
+    # Dates in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.dates(rng, 1).tolist()[0]
+    return temporal.dates(rng, n)
 
 
-def date_time_():
-    return fake.date_time()
+def date_time_(n=None):
+    # Timestamps without timezone in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.datetimes(rng, 1).tolist()[0]
+    return temporal.datetimes(rng, n)
 
 
 def boolean_data():
     return r.choice([True, False])
 
 
-def point_data():
-    fake_location = fake.location_on_land()
-    return str(Point([float(fake_location[1]), float(fake_location[0])]))
+def point_data(n=None):
+    # WKT points on land, see the 'geo' module
+    if n is None:
+        return geo.points(rng, 1)[0]
+    return geo.points(rng, n)
 
 
-def mobile():
-    return fake.phone_number()
+def mobile(max_length=None):
+    # Phone numbers are cut to the maximum length of their column, e.g. for numbers with a country code
+    return fake.phone_number()[:max_length]
 
 
-def find_faker_func(col_name):
-    for elem in dir(fake):
-        if elem in col_name:
-            return elem
+def find_faker_func(col_name, table=None):
+    # Returns the longest Faker function name contained in the column name, see the 'faker_index' module
+    elem = faker_index.find(fake, LOCALE, col_name, table)
+    if elem is not None:
+        return elem
     raise cannotBeEvaluated(col_name)
 
 
 def fake_data(elem):
-    return None if elem is None else str(eval("fake." + elem + "()"))
+    return None if elem is None else str(getattr(fake, elem)())
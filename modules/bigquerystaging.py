@@ -0,0 +1,110 @@
+"""
+This module writes generated chunks to local Parquet or Avro staging files using the schema of a BigQuery table.
+The staging files are then loaded into BigQuery with load jobs by the 'bigquery' module.
+For more information, see the section on BigQuery in README.md
+
+"""
+import base64
+from datetime import datetime, timezone
+from decimal import Context, Decimal
+
+import numpy as np
+
+# Precision and scale of the decimal types used for NUMERIC and BIGNUMERIC fields. BIGNUMERIC values have up to 39
+# integer digits, Parquet decimals can not be more precise than 76 digits so they keep one digit less of scale
+DECIMAL_TYPES = {"NUMERIC": (38, 9), "BIGNUMERIC": (77, 38)}
+PARQUET_DECIMAL_TYPES = {"NUMERIC": (38, 9), "BIGNUMERIC": (76, 37)}
+DECIMAL_CONTEXT = Context(prec=80)
+
+
+def to_decimal(value, scale):
+    return None if value is None else Decimal(value).quantize(Decimal(1).scaleb(-scale), context=DECIMAL_CONTEXT)
+
+
+def to_bytes(value):
+    # The 'bigqueryhelper' module generates BYTES values as base64 strings, as expected by streaming and pandas-gbq
+    return base64.b64decode(value) if isinstance(value, str) else value
+
+
+def to_utc(value):
+    # TIMESTAMP values without a timezone are taken as UTC
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def field_values(field, values, decimal_types=DECIMAL_TYPES):
+    # Converts the generated values of a field to the Python types expected by the file writers
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    field_type = field.field_type
+    if field_type in decimal_types:
+        return [to_decimal(value, decimal_types[field_type][1]) for value in values]
+    if field_type == "BYTES":
+        return [to_bytes(value) for value in values]
+    if field_type == "TIMESTAMP":
+        return [to_utc(value) for value in values]
+    return values
+
+
+def arrow_type(field):
+    import pyarrow as pa
+
+    field_type = field.field_type
+    if field_type in PARQUET_DECIMAL_TYPES:
+        precision, scale = PARQUET_DECIMAL_TYPES[field_type]
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    return {
+        "INTEGER": pa.int64(), "INT64": pa.int64(), "FLOAT": pa.float64(), "FLOAT64": pa.float64(),
+        "BOOLEAN": pa.bool_(), "BOOL": pa.bool_(), "BYTES": pa.binary(), "DATE": pa.date32(),
+        "TIME": pa.time64("us"), "DATETIME": pa.timestamp("us"), "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    }.get(field_type, pa.string())
+
+
+def avro_type(field):
+    field_type = field.field_type
+    if field_type in DECIMAL_TYPES:
+        precision, scale = DECIMAL_TYPES[field_type]
+        avro = {"type": "bytes", "logicalType": "decimal", "precision": precision, "scale": scale}
+    else:
+        avro = {
+            "INTEGER": "long", "INT64": "long", "FLOAT": "double", "FLOAT64": "double", "BOOLEAN": "boolean",
+            "BOOL": "boolean", "BYTES": "bytes", "DATE": {"type": "int", "logicalType": "date"},
+            "TIME": {"type": "long", "logicalType": "time-micros"},
+            "DATETIME": {"type": "string", "logicalType": "datetime"},
+            "TIMESTAMP": {"type": "long", "logicalType": "timestamp-micros"},
+        }.get(field_type, "string")
+    return avro if field.mode == "REQUIRED" else ["null", avro]
+
+
+def write_parquet(path, data, fields):
+    # Writes a dictionary of generated columns to a Parquet file with the types of the BigQuery fields
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = {field.name.lower(): field for field in fields}
+    arrays, names = [], []
+    for column, values in data.items():
+        field = fields[column.lower()]
+        arrays.append(pa.array(field_values(field, values, PARQUET_DECIMAL_TYPES), type=arrow_type(field)))
+        names.append(field.name)
+    pq.write_table(pa.Table.from_arrays(arrays, names=names), path)
+
+
+def write_avro(path, data, fields):
+    # Writes a dictionary of generated columns to an Avro file with the types of the BigQuery fields
+    import fastavro
+
+    fields = {field.name.lower(): field for field in fields}
+    columns = [(fields[column.lower()], values) for column, values in data.items()]
+    schema = {"type": "record", "name": "Row",
+              "fields": [{"name": field.name, "type": avro_type(field)} for field, _ in columns]}
+    values = []
+    for field, column_values in columns:
+        column_values = field_values(field, column_values)
+        if field.field_type == "DATETIME":
+            column_values = [None if value is None else value.isoformat(" ") for value in column_values]
+        values.append(column_values)
+
+    names = [field.name for field, _ in columns]
+    with open(path, "wb") as file:
+        fastavro.writer(file, fastavro.parse_schema(schema), (dict(zip(names, row)) for row in zip(*values)))
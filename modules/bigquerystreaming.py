@@ -0,0 +1,111 @@
+"""
+This module streams generated rows into BigQuery in micro-batches.
+The rate of rows is limited with a token bucket, several batches can be in flight at once and the rows of a batch
+rejected by BigQuery are sent again together, as a smaller batch, up to max_retries times. The client only needs an insert_rows_json(table, rows) method, so a local fake
+client can be used in place of google.cloud.bigquery.Client.
+It is used in conjunction with the 'bigquery' module.
+For more information, see the section on BigQuery in README.md
+
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as time_of_day
+
+
+class TokenBucket:
+    """
+    Limits a rate to 'rate' tokens per second, allowing bursts of up to 'capacity' tokens (one second by default).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        # Blocks until n tokens are available and takes them. More than 'capacity' tokens are taken on credit
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def json_value(value):
+    # insert_rows_json only accepts JSON values, dates and times are sent in ISO format
+    if isinstance(value, (date, time_of_day)):
+        return value.isoformat()
+    return value
+
+
+def json_row(row):
+    return {key: json_value(value) for key, value in row.items()}
+
+
+class Streamer:
+    """
+    Streams rows into a BigQuery table in batches of batch_size rows with up to max_in_flight concurrent inserts.
+    If rate is set, no more than rate rows are sent per second. Rows that fail are retried up to max_retries times.
+    """
+
+    def __init__(self, client, table, logger, batch_size=500, rate=0, max_in_flight=4, max_retries=3):
+        self.client, self.table, self.logger = client, table, logger
+        self.batch_size, self.max_in_flight, self.max_retries = batch_size, max_in_flight, max_retries
+        self.bucket = TokenBucket(rate) if rate else None
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.in_flight = deque()
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            batch = [json_row(row) for row in rows[start:start + self.batch_size]]
+            if self.bucket is not None:
+                self.bucket.acquire(len(batch))
+            # Wait for the oldest insert before starting a new one once max_in_flight inserts are running
+            while len(self.in_flight) >= self.max_in_flight:
+                self.failed += self.in_flight.popleft().result()
+            self.in_flight.append(self.executor.submit(self.insert, batch))
+
+    def flush(self):
+        # Waits for the inserts in flight
+        while self.in_flight:
+            self.failed += self.in_flight.popleft().result()
+
+    def close(self):
+        # Waits for the inserts in flight and returns the number of rows that could not be streamed
+        self.flush()
+        self.executor.shutdown()
+        return self.failed
+
+    def insert(self, rows):
+        # Inserts a batch and retries the rows that failed, returns the number of rows that still failed
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(min(2 ** (attempt - 1), 30))
+            try:
+                errors = self.client.insert_rows_json(self.table, rows)
+            except (Exception,) as e:
+                # The whole batch failed, e.g. because of a network error
+                self.logger.warning("Streaming " + str(len(rows)) + " rows to BigQuery failed: " + str(e))
+                continue
+            if not errors:
+                return 0
+            rows = [rows[error["index"]] for error in errors]
+            self.logger.warning(str(len(rows)) + " rows were rejected by BigQuery, e.g.: " + str(errors[0]))
+
+        self.logger.error(str(len(rows)) + " rows could not be streamed to BigQuery after " +
+                          str(self.max_retries) + " retries.")
+        return len(rows)
@@ -0,0 +1,49 @@
+"""
+This module generates whole columns of binary values in bulk from a single random buffer per chunk.
+Every value is a memoryview slice of the buffer, so no bytes object is built per value, and the lengths of the values
+are sampled in BINARY_LENGTHS (see config/definitions.py), up to the maximum length of the column.
+The loaders encode the buffer of a column at once (e.g. as hex for PostgreSQL) instead of every value.
+It is used in conjunction with the 'bigqueryhelper', 'mysqlhelper' and 'postgresqlhelper' modules.
+
+"""
+import base64
+
+import numpy as np
+
+from config.definitions import BINARY_LENGTHS
+
+
+class BinaryColumn(list):
+    """
+    The binary values of a column, as a list of memoryview slices of buffer.
+    Value i is buffer[offsets[i]:offsets[i + 1]], so the loaders can encode the buffer once and slice the result.
+    """
+
+    def __init__(self, buffer, offsets):
+        view = memoryview(buffer)
+        bounds = offsets.tolist()
+        super().__init__(view[start:end] for start, end in zip(bounds, bounds[1:]))
+        self.buffer, self.offsets = buffer, offsets
+
+    def hex(self, prefix=""):
+        # Returns every value in hex, the buffer is converted to hex at once
+        hex_buffer = self.buffer.hex()
+        bounds = (self.offsets * 2).tolist()
+        return [prefix + hex_buffer[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def base64(self):
+        return [base64.b64encode(value).decode("ascii") for value in self]
+
+    def to_bytes(self):
+        # Returns every value as bytes, for drivers that do not accept memoryview values
+        return [bytes(value) for value in self]
+
+
+def values(rng, n, max_length=None):
+    # Returns n binary values of random lengths in BINARY_LENGTHS, no longer than max_length if it is set
+    low, high = BINARY_LENGTHS
+    if max_length:
+        low, high = min(low, max_length), min(high, max_length)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(rng.integers(low, high + 1, n), out=offsets[1:])
+    return BinaryColumn(rng.bytes(int(offsets[-1])), offsets)
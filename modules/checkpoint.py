@@ -0,0 +1,88 @@
+"""
+This module records the chunks committed by the loaders of a run in a local checkpoint file, so that a failed run
+can be resumed instead of started over. The file starts with the seed and the chunk size of the run, followed by
+a line with the table, first row and row count of every committed chunk. As every chunk is generated from a seed
+derived from the seed of the run and the index of the chunk, a resumed run skips the committed chunks and generates
+the remaining ones with the same ids and values as the failed run.
+It is used in conjunction with the 'pipeline', 'scheduler', 'bigquery', 'mysql_dg' and 'postgresql' modules.
+For more information, see the section on Configuration in README.md
+
+"""
+import json
+import os
+import re
+
+from config.definitions import ROOT_DIR
+
+CHECKPOINT_DIR = os.path.join(ROOT_DIR, 'files', 'checkpoints')
+
+
+def checkpoint_path(backend, target):
+    # The checkpoint file of a backend and its target (e.g. a dataset or a database) in the checkpoints folder
+    return os.path.join(CHECKPOINT_DIR, backend + "_" + re.sub(r"[^\w.-]", "_", target) + ".jsonl")
+
+
+class Checkpoint:
+    """
+    The checkpoint file of a run and the committed chunks of its tables, as {table: {first row: row count}}.
+    'table' is set on the checkpoint of a single table (see of()), which is picklable and records the chunks loaded by
+    a worker process. Lines are appended in a single write, so several processes can record chunks in the same file.
+    """
+
+    def __init__(self, path, seed, chunk_size, committed=None, table=None):
+        self.path, self.seed, self.chunk_size, self.table = path, seed, chunk_size, table
+        self.committed = committed if committed is not None else {}
+
+    @classmethod
+    def start(cls, path, seed, chunk_size):
+        # Starts the checkpoint file of a new run, replacing the file of any previous run
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(json.dumps({"seed": seed, "chunk_size": chunk_size}) + "\n")
+        return cls(path, seed, chunk_size)
+
+    @classmethod
+    def load(cls, path):
+        # Returns the checkpoint of a previous run, or None if there is no checkpoint file
+        if not os.path.exists(path):
+            return None
+        with open(path) as file:
+            header = json.loads(file.readline())
+            checkpoint = cls(path, header["seed"], header["chunk_size"])
+            for line in file:
+                # A line cut short by a crash while it was written is not a committed chunk
+                if line.endswith("\n"):
+                    chunk = json.loads(line)
+                    checkpoint.committed.setdefault(chunk["table"], {})[chunk["first"]] = chunk["rows"]
+        return checkpoint
+
+    def of(self, table):
+        return Checkpoint(self.path, self.seed, self.chunk_size, {table: self.committed.get(table, {})}, table)
+
+    def rows(self, table):
+        return sum(self.committed.get(table, {}).values())
+
+    def is_committed(self, first, rows):
+        # A chunk is only skipped if it was committed with the same rows, e.g. not if the record count has changed
+        return self.committed.get(self.table, {}).get(first) == rows
+
+    def record(self, first, rows):
+        with open(self.path, "a") as file:
+            file.write(json.dumps({"table": self.table, "first": first, "rows": rows}) + "\n")
+
+    def remove(self):
+        # Removes the checkpoint file once the run has completed
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def open_checkpoint(path, resume, seed, chunk_size, logger):
+    # Returns the checkpoint of the previous run if resume is set and it has one, else starts a new checkpoint file
+    if resume:
+        checkpoint = Checkpoint.load(path)
+        if checkpoint is not None:
+            logger.info("Resuming the run of the checkpoint file " + path + " with seed " + str(checkpoint.seed) +
+                        " and chunks of " + str(checkpoint.chunk_size) + " rows.")
+            return checkpoint
+        logger.warning("There is no checkpoint file " + path + " to resume, a new run has begun.")
+    return Checkpoint.start(path, seed, chunk_size)
@@ -0,0 +1,152 @@
+"""
+This module compiles the helper functions resolved for the columns of a table into a plan.
+The plan is built once per table and holds a direct callable for every column, so generating data does not
+need to build or evaluate any strings.
+It is used in conjunction with the 'bigquery', 'mysql_dg' and 'postgresql' modules.
+
+"""
+import inspect
+import time
+from importlib import import_module
+
+import numpy as np
+
+from modules import uniqueness
+
+# Special generator names that are not functions of the helper module
+ID = "id"
+FAKER = "faker"
+REF = "ref"
+
+
+def to_rows(data):
+    # Converts a dictionary of generated columns into a list of row dictionaries with plain Python values
+    values = [column.tolist() if isinstance(column, np.ndarray) else column for column in data.values()]
+    return [dict(zip(data.keys(), row)) for row in zip(*values)]
+
+
+def _load_plan(helper_name, spec, pool_size, pool_refresh, unique):
+    return ColumnPlan(import_module(helper_name), spec, pool_size, pool_refresh, unique)
+
+
+class ColumnPlan:
+    """
+    An ordered list of columns and their generators.
+    Every generator takes the index of the first row and a row count and returns the values of that column.
+    The plan is described by its spec, a list of (column, generator, args) tuples, where generator is either
+    the name of a helper module function, ID for a row counter starting at args[0], FAKER for the Faker
+    provider named args[0], with values cut to args[1] characters if it is set, or REF for keys sampled from the
+    range args[0] to args[1] - 1 of a parent table. If args[1] is None, the table references itself and every row
+    is given the key of a row up to itself.
+    Plans are pickled by their spec and recompiled when they are unpickled.
+    If pool_size is set, every FAKER column builds a pool of pool_size values once and samples from it, rebuilding
+    the pool after every pool_refresh chunks (never if pool_refresh is 0). Once seeded with the seed of a run, pools
+    are built from that seed and the index of the pool, so the same pools are built whatever worker generates a chunk.
+    unique holds the (maximum length, bits) of the columns whose values must be distinct, see the 'uniqueness' module.
+    The seconds spent generating every column are added up in timings.
+    """
+
+    def __init__(self, helper, spec=(), pool_size=0, pool_refresh=0, unique=None):
+        self.helper = helper
+        self.pool_size, self.pool_refresh = pool_size, pool_refresh
+        self.unique = unique or {}
+        self.run_seed, self.chunk = None, 0
+        self.spec, self.columns, self.generators = [], [], []
+        self.timings = {}
+        for column, generator, args in spec:
+            self.add(column, generator, *args)
+
+    def __reduce__(self):
+        return _load_plan, (self.helper.__name__, self.spec, self.pool_size, self.pool_refresh, self.unique)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def add(self, column, generator, *args):
+        self.spec.append((column, generator, args))
+        self.columns.append(column)
+        generate = self._compile(generator, args)
+        if column.lower() in self.unique and generator not in (ID, REF):
+            generate = self._unique(generate, *self.unique[column.lower()])
+        self.generators.append(generate)
+
+    def _compile(self, generator, args):
+        if generator == ID:
+            offset = args[0]
+            return lambda start, n: np.arange(start + offset, start + offset + n)
+
+        if generator == REF:
+            return self._reference(*args)
+
+        if generator == FAKER:
+            provider = getattr(self.helper.fake, args[0])
+            max_length = args[1] if len(args) > 1 else None
+            if self.pool_size:
+                return self._faker_pool(provider, max_length, len(self.spec) - 1)
+            return lambda start, n: [str(provider())[:max_length] for _ in range(n)]
+
+        func = getattr(self.helper, generator)
+        # Use the batch API of the helper function if it has one, else call it once per value
+        if "n" in inspect.signature(func).parameters:
+            return lambda start, n: func(*args, n=n)
+        return lambda start, n: [func(*args) for _ in range(n)]
+
+    def _reference(self, low, high):
+        # The generator is looked up on every call as seeding the helper module replaces it
+        if high is None:
+            return lambda start, n: low + (self.helper.rng.random(n) * np.arange(start + 1, start + n + 1)).astype(
+                np.int64)
+        return lambda start, n: self.helper.rng.integers(low, high, n)
+
+    @staticmethod
+    def _unique(generate, max_length, bits):
+        # Integer columns only depend on the row index, other columns get a suffix made from the row index
+        if bits:
+            return lambda start, n: uniqueness.integers(start, n, bits)
+        return lambda start, n: uniqueness.strings(generate(start, n), start, max_length)
+
+    def _faker_pool(self, provider, max_length, column):
+        pool, index, calls = None, 0, 0
+
+        def generate(start, n):
+            nonlocal pool, index, calls
+            # The index of the pool follows the index of the chunk in the run, or the calls if the plan is not seeded
+            chunk = calls if self.run_seed is None else self.chunk
+            calls += 1
+            current = chunk // self.pool_refresh if self.pool_refresh else 0
+            if pool is None or current != index:
+                pool, index = self._build_pool(provider, max_length, column, current), current
+            # The generator is looked up on every call as seeding the helper module replaces it
+            return pool[self.helper.rng.integers(0, self.pool_size, n)]
+
+        return generate
+
+    def _build_pool(self, provider, max_length, column, index):
+        if self.run_seed is None:
+            return np.array([str(provider())[:max_length] for _ in range(self.pool_size)], dtype=object)
+        # Build the pool from its own seed and restore the state of Faker, so that other columns are not affected
+        fake = self.helper.fake
+        state = fake.random.getstate()
+        fake.seed_instance(int(np.random.SeedSequence([self.run_seed, index, column]).generate_state(1)[0]))
+        try:
+            return np.array([str(provider())[:max_length] for _ in range(self.pool_size)], dtype=object)
+        finally:
+            fake.random.setstate(state)
+
+    def seed(self, value, run_seed=None, chunk=0):
+        # Seeds the helper module for a chunk, the seed of the run and the index of the chunk are used by Faker pools
+        self.helper.seed(value)
+        self.run_seed, self.chunk = run_seed, chunk
+
+    def generate(self, start, n):
+        # Returns a dictionary with the values of every column for the rows start to start + n - 1
+        data = {}
+        for column, generator in zip(self.columns, self.generators):
+            began = time.perf_counter()
+            data[column] = generator(start, n)
+            self.timings[column] = self.timings.get(column, 0) + time.perf_counter() - began
+        return data
+
+    def rows(self, start, n):
+        # Returns the same values as generate() as a list of row dictionaries with plain Python values
+        return to_rows(self.generate(start, n))
@@ -17,3 +17,19 @@ class tableDoesNotExist(Exception):
 
     def __init__(self, field):
         self.message = "The table " + field + " does not exist."
+
+
+class rowsNotStreamed(Exception):
+    message = ""
+
+    def __init__(self, rows, first):
+        self.message = str(rows) + " rows of the chunk starting at row " + str(first) + " could not be streamed."
+        super().__init__(self.message)
+
+
+class cannotBeUnique(cannotBeEvaluated):
+    # A column of UniqueColumns that cannot hold distinct values, it is left out like a column that cannot be evaluated
+    message = ""
+
+    def __init__(self, field, reason):
+        self.message = field + ": The values of this column cannot be made unique, " + reason + "."
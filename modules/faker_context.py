@@ -0,0 +1,11 @@
+"""
+This module holds the Faker instance shared by the helper modules, so that it is only built once per process.
+It is used in conjunction with the 'bigqueryhelper', 'mysqlhelper' and 'postgresqlhelper' modules.
+
+"""
+from faker import Faker
+
+from config.definitions import LOCALE
+
+fake = Faker(locale=LOCALE)
+Faker.seed()
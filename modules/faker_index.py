@@ -0,0 +1,137 @@
+"""
+This module resolves column names to the Faker functions used to generate their data.
+It builds an index of the Faker functions of a locale once and matches a column name to the longest function
+name it contains. Resolved columns are cached on disk per table and column, so the next runs do not have to
+match them again.
+It is used in conjunction with the 'bigqueryhelper', 'mysqlhelper' and 'postgresqlhelper' modules.
+
+"""
+import inspect
+import json
+import os
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from faker import VERSION
+from faker.providers import BaseProvider
+
+from config.definitions import ROOT_DIR
+
+CACHE_FILE = os.path.join(ROOT_DIR, 'cache', 'faker_cache.json')
+# Key of the end of a function name in the nodes of the index
+END = ""
+# Version of the provider names in the cache file, changed whenever provider_names() keeps other functions
+INDEX_VERSION = 2
+# Archive, binary and file format functions, which do not generate the value of a single cell (or are slow to call)
+FILE_PROVIDERS = ("binary", "zip", "tar", "image", "xml", "json", "json_bytes", "csv", "tsv", "psv", "dsv",
+                  "fixed_width")
+# Only the functions returning a single text, number or date are indexed
+SCALAR_TYPES = (str, int, float, Decimal, date, time, timedelta)
+# Column names matched to a function of another name, e.g. zip_code to postcode as 'zip' is an archive function
+ALIASES = {"zip": "postcode", "pincode": "postcode", "pin_code": "postcode"}
+# The lorem providers of Faker, columns resolved to them are generated in bulk by the 'text_engine' module instead
+LOREM_PROVIDERS = ("text", "texts", "sentence", "sentences", "paragraph", "paragraphs", "words")
+
+_indexes, _cache = {}, None
+
+
+def provider_names(fake):
+    # Returns the names of the public Faker functions that can be called without arguments and return a scalar value
+    names = []
+    for name in dir(fake):
+        if name.startswith("_"):
+            continue
+        try:
+            func = getattr(fake, name)
+        except (Exception,):
+            continue
+        if not inspect.ismethod(func) or not isinstance(func.__self__, BaseProvider) or name in FILE_PROVIDERS:
+            continue
+        parameters = inspect.signature(func).parameters.values()
+        if not all(p.default is not p.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in parameters):
+            continue
+        # Every function is called once to check its value, the names are cached for the Faker version
+        try:
+            value = func()
+        except (Exception,):
+            # e.g. functions that need an optional library
+            continue
+        if isinstance(value, SCALAR_TYPES):
+            names.append(name)
+    return names
+
+
+def build_index(names):
+    # Builds a trie of the function names and their aliases, every node maps a character to the next node
+    index = {}
+    entries = [(name, name) for name in names] + [(alias, name) for alias, name in ALIASES.items() if name in names]
+    for key, name in entries:
+        node = index
+        for char in key:
+            node = node.setdefault(char, {})
+        node[END] = name
+    return index
+
+
+def longest_match(index, col_name):
+    # Returns the function of the longest name (or alias) contained in the column name, or None if it contains none
+    match, length = None, 0
+    for start in range(len(col_name)):
+        node = index
+        for end, char in enumerate(col_name[start:], start + 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if END in node and end - start > length:
+                match, length = node[END], end - start
+    return match
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_FILE) as file:
+                _cache = json.load(file)
+        except (OSError, ValueError):
+            _cache = {}
+        # Cached function names are only valid for the Faker version and the index version that resolved them
+        if _cache.get("version") != VERSION or _cache.get("index") != INDEX_VERSION:
+            _cache = {"version": VERSION, "index": INDEX_VERSION, "providers": {}, "columns": {}}
+    return _cache
+
+
+def save():
+    # Writes the resolved columns to the cache file, replacing it in one step so readers never see a partial file
+    if _cache is None:
+        return
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    temp_file = CACHE_FILE + "." + str(os.getpid())
+    with open(temp_file, "w") as file:
+        json.dump(_cache, file, indent=1, sort_keys=True)
+    os.replace(temp_file, CACHE_FILE)
+
+
+def get_index(fake, locale):
+    if locale not in _indexes:
+        cache = _load_cache()
+        if locale not in cache["providers"]:
+            cache["providers"][locale] = provider_names(fake)
+        _indexes[locale] = build_index(cache["providers"][locale])
+    return _indexes[locale]
+
+
+def find(fake, locale, col_name, table=None):
+    """
+    Returns the name of the Faker function of the locale that generates the column, or None if there is none.
+    If a table is given, the result is cached for the table and column.
+    """
+    columns = _load_cache()["columns"].setdefault(locale, {})
+    key = None if table is None else table + "." + col_name
+    if key in columns:
+        return columns[key]
+
+    match = longest_match(get_index(fake, locale), col_name)
+    if key is not None and match is not None:
+        columns[key] = match
+    return match
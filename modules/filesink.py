@@ -0,0 +1,212 @@
+"""
+This module writes generated data to local CSV, Parquet or JSONL files instead of a database or data warehouse.
+The columns are declared in the config file with BigQuery data types and resolved like the columns of a BigQuery
+table. It is used in conjunction with the 'bigqueryhelper' and 'bigquerycolumns' modules.
+For more information, see the section on Files in README.md
+
+"""
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+import re
+import traceback
+
+import numpy as np
+from configparser import ConfigParser
+from contextlib import contextmanager
+from functools import partial
+
+from config.definitions import ROOT_DIR, FILES, CHUNK_SIZE
+from modules import bigqueryhelper, bigquerycolumns, column_plan, faker_index, introspection, pipeline, \
+    uniqueness, logging_module, exit_messages
+from modules.data_generation_exceptions import cannotBeEvaluated
+from modules.metrics import Metrics
+
+bqh = bigqueryhelper
+configParser = ConfigParser()
+
+FORMATS = ("csv", "parquet", "jsonl")
+# The functions opening compressed text files and their extensions, Parquet files are compressed by pyarrow
+OPENERS = {"gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+
+
+def parse_columns(value):
+    # Parses a list of columns such as "id:INT64, price:NUMERIC(10,2), name:STRING", columns without a type are strings
+    columns = []
+    for item in re.split(r",(?![^()]*\))", value):
+        if item.strip():
+            name, _, data_type = item.partition(":")
+            columns.append(introspection.parse_type(name.strip(), data_type.strip() or "STRING"))
+    return columns
+
+
+def text_value(value):
+    # Values of text files, missing values are written as empty fields
+    return "" if value is None else value
+
+
+class FileSink:
+    """
+    Writes chunks of generated columns to files of rows_per_file rows (a single file if rows_per_file is 0).
+    Every file is named after the index of its first row, so the workers of a run never write to the same file.
+    """
+
+    def __init__(self, path_prefix, file_format="csv", compression="", rows_per_file=0):
+        self.path_prefix, self.file_format, self.rows_per_file = path_prefix, file_format, rows_per_file
+        self.compression = compression if compression not in ("", "none") else None
+        self.file = self.writer = None
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self, first, columns):
+        path = self.path_prefix + "_" + str(first).zfill(12) + "." + self.file_format
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self.file = partial(pq.ParquetWriter, path, compression=self.compression or "snappy")
+            return
+        opener, extension = OPENERS[self.compression] if self.compression else (open, "")
+        self.file = opener(path + extension, "wt", newline="", encoding="utf-8")
+        if self.file_format == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(columns)
+
+    def write_part(self, data):
+        if self.file_format == "parquet":
+            import pyarrow as pa
+
+            table = pa.table({column: values if isinstance(values, np.ndarray) else list(values)
+                              for column, values in data.items()})
+            if self.writer is None:
+                # The schema of a file is the one of its first chunk
+                self.writer = self.file(table.schema)
+            self.writer.write_table(table.cast(self.writer.schema))
+            return
+
+        columns = [values.tolist() if isinstance(values, np.ndarray) else values for values in data.values()]
+        if self.file_format == "csv":
+            self.writer.writerows([text_value(value) for value in row] for row in zip(*columns))
+        else:
+            names = list(data)
+            self.file.writelines(json.dumps(dict(zip(names, row)), default=str) + "\n" for row in zip(*columns))
+
+    def write(self, first, data):
+        # Writes the rows first to first + n - 1, starting a new file every rows_per_file rows
+        n = len(next(iter(data.values())))
+        offset = 0
+        while offset < n:
+            if self.file is None:
+                self.open(first + offset, list(data))
+            count = n - offset if not self.rows_per_file else min(n - offset, self.rows_per_file - self.rows)
+            if count == n:
+                self.write_part(data)
+            else:
+                self.write_part({column: values[offset:offset + count] for column, values in data.items()})
+            self.rows += count
+            offset += count
+            if self.rows_per_file and self.rows >= self.rows_per_file:
+                self.close()
+
+    def close(self):
+        if self.writer is not None and self.file_format == "parquet":
+            self.writer.close()
+        elif self.file is not None and self.file_format != "parquet":
+            self.file.close()
+        self.file = self.writer = None
+        self.rows = 0
+
+
+@contextmanager
+def open_loader(path_prefix, file_format, compression, rows_per_file):
+    # Sets up the writing of generated chunks to files, every worker process writes its own files
+    with FileSink(path_prefix, file_format, compression, rows_per_file) as sink:
+        yield sink.write
+
+
+def main():
+    errors_raised = False
+
+    # Set up a logger for the filesink module
+    files_logger = logging_module.setup_logger('files_logger', 'files.log', 'CRITICAL')
+
+    configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
+    try:
+        configParser.read_file(open(configfilepath))
+    except(Exception,):
+        files_logger.critical("An error occurred while reading the config file: " + traceback.format_exc())
+
+    # Fetch the Files configuration options from config file
+    table_id = configParser.get(FILES, 'Table')
+    columns = parse_columns(configParser.get(FILES, 'Columns'))
+    n_record = int(configParser.get(FILES, 'RecordCount'))
+    file_format = (configParser.get(FILES, 'Format', fallback='') or "csv").lower()
+    compression = configParser.get(FILES, 'Compression', fallback='').lower()
+    rows_per_file = int(configParser.get(FILES, 'RowsPerFile', fallback='') or 0)
+    output_dir = os.path.join(ROOT_DIR, 'files', configParser.get(FILES, 'OutputDir', fallback='') or 'output')
+    chunk_size = int(configParser.get(FILES, 'ChunkSize', fallback='') or CHUNK_SIZE)
+    workers = int(configParser.get(FILES, 'Workers', fallback='') or 1)
+    queue_depth = int(configParser.get(FILES, 'QueueDepth', fallback='') or 2)
+    load_workers = int(configParser.get(FILES, 'LoadWorkers', fallback='') or 1)
+    seed = int(configParser.get(FILES, 'Seed', fallback='') or pipeline.new_seed())
+    pool_size = int(configParser.get(FILES, 'FakerPoolSize', fallback='') or 0)
+    pool_refresh = int(configParser.get(FILES, 'FakerPoolRefresh', fallback='') or 0)
+    unique_columns = uniqueness.parse(configParser.get(FILES, 'UniqueColumns', fallback=''))
+    loglevel = configParser.get(FILES, 'LogLevel', fallback='')
+
+    # Change the log level to the level entered by user
+    if loglevel:
+        files_logger = logging_module.set_logging_level(files_logger, loglevel)
+
+    files_logger.info("Entered Files module: Data Generation Process for local files has begun.")
+    metrics = Metrics("files", 'files_logger', 'files.log')
+
+    if file_format not in FORMATS:
+        files_logger.critical("Unsupported file format " + file_format + ". Supported formats are: " +
+                              ", ".join(FORMATS))
+        exit_messages.error_exit()
+    if compression not in ("", "none") and file_format != "parquet" and compression not in OPENERS:
+        files_logger.critical("Unsupported compression " + compression + ". Supported compressions are: " +
+                              ", ".join(OPENERS))
+        exit_messages.error_exit()
+    if not columns:
+        files_logger.critical("No columns are declared for the table " + table_id + ".")
+        exit_messages.error_exit()
+
+    files_logger.debug("Fetching the relevant functions from the 'bigqueryhelper' module...")
+    plan = column_plan.ColumnPlan(bqh, pool_size=pool_size, pool_refresh=pool_refresh,
+                                  unique=uniqueness.limits(columns, unique_columns, table_id))
+    # Compile the 'bigqueryhelper' functions for every declared column into the plan according to the column types
+    with metrics.phase("resolution"):
+        for column in columns:
+            try:
+                uniqueness.check(column, unique_columns, table_id, n_record)
+                bigquerycolumns.add_column(plan, column, "files." + table_id)
+            except cannotBeEvaluated as e:
+                files_logger.error(e.message)
+                errors_raised = True
+
+        faker_index.save()
+
+    # Generate rows in chunks using the compiled plan and write every chunk to the output files
+    files_logger.info("Generating data with " + str(workers) + " worker(s) and seed " + str(seed) + ".")
+    os.makedirs(output_dir, exist_ok=True)
+    loader = partial(open_loader, os.path.join(output_dir, table_id), file_format, compression, rows_per_file)
+    try:
+        with metrics.phase("pipeline"):
+            pipeline.run(plan, n_record, chunk_size, loader, workers, seed, metrics, queue_depth, load_workers)
+    except(Exception,):
+        files_logger.error("There was an error while writing data to files: " + traceback.format_exc())
+        exit_messages.error_exit()
+
+    metrics.write()
+
+    files_logger.debug("Data generation process for local files is now complete!")
+    return errors_raised
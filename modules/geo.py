@@ -0,0 +1,42 @@
+"""
+This module generates whole columns of points on land in bulk, formatted as WKT (e.g. POINT (1.53414 42.50729)).
+The land locations of Faker are loaded once into arrays of longitudes and latitudes, and the locations of all the
+rows of a chunk are sampled at once, optionally moved by up to POINT_JITTER degrees (see config/definitions.py).
+It is used in conjunction with the 'bigqueryhelper' and 'mysqlhelper' modules.
+
+"""
+import numpy as np
+
+from config.definitions import POINT_JITTER
+
+_locations = None
+
+
+def locations():
+    """
+    Returns the longitudes, latitudes and WKT points of the land locations of Faker, loaded on first use.
+    Without jitter, points are only ever these locations, so they are formatted once here.
+    """
+    global _locations
+    if _locations is None:
+        from faker.providers.geo import Provider
+
+        coords = [(float(lon), float(lat)) for lat, lon, *_ in Provider.land_coords]
+        _locations = (np.array([lon for lon, _ in coords]), np.array([lat for _, lat in coords]),
+                      np.array([wkt(lon, lat) for lon, lat in coords], dtype=object))
+    return _locations
+
+
+def wkt(longitude, latitude):
+    return "POINT (%r %r)" % (longitude, latitude)
+
+
+def points(rng, n, jitter=POINT_JITTER):
+    # Returns n WKT points sampled from the land locations, every coordinate moved by up to jitter degrees
+    longitudes, latitudes, wkt_points = locations()
+    picked = rng.integers(0, len(longitudes), n)
+    if not jitter:
+        return wkt_points[picked].tolist()
+    longitudes = np.round((longitudes[picked] + rng.uniform(-jitter, jitter, n) + 180) % 360 - 180, 6)
+    latitudes = np.round(np.clip(latitudes[picked] + rng.uniform(-jitter, jitter, n), -90, 90), 6)
+    return list(map(wkt, longitudes.tolist(), latitudes.tolist()))
@@ -0,0 +1,60 @@
+"""
+This module describes the introspected columns of a table and caches them locally per table.
+The columns are fetched with a single query per table by the 'bigquery', 'mysql_dg' and 'postgresql' modules,
+which use their declared data types to choose the helper function of every column.
+
+"""
+import json
+import os
+import re
+from collections import namedtuple
+
+from config.definitions import ROOT_DIR
+
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache', 'schema')
+
+# 'length' is the maximum length of character and bit types, 'precision' and 'scale' those of numeric types
+Column = namedtuple('Column', ['name', 'data_type', 'length', 'precision', 'scale', 'nullable'])
+
+
+def text(value):
+    # Some drivers return the values of information_schema as bytes
+    return value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else value
+
+
+def column(name, data_type, length=None, precision=None, scale=None, nullable="YES"):
+    return Column(text(name), text(data_type).lower(), None if length is None else int(length),
+                  None if precision is None else int(precision), None if scale is None else int(scale),
+                  text(nullable) == "YES")
+
+
+def parse_type(name, data_type, nullable="YES"):
+    # Builds a column from a parameterized type such as STRING(10) or NUMERIC(10, 2), as used by BigQuery
+    match = re.match(r"\s*([^(]+?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*$", data_type)
+    if match is None:
+        return column(name, data_type, nullable=nullable)
+    base, first, second = match.groups()
+    if second is not None or base.upper() in ("NUMERIC", "BIGNUMERIC", "DECIMAL", "BIGDECIMAL"):
+        return column(name, base, precision=first, scale=second, nullable=nullable)
+    return column(name, base, length=first, nullable=nullable)
+
+
+def _cache_file(backend, table):
+    return os.path.join(CACHE_DIR, backend + "." + table + ".json")
+
+
+def load(backend, table):
+    # Returns the cached columns of the table, or None if they are not cached
+    try:
+        with open(_cache_file(backend, table)) as file:
+            return [Column(*values) for values in json.load(file)]
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def store(backend, table, columns):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temp_file = _cache_file(backend, table) + "." + str(os.getpid())
+    with open(temp_file, "w") as file:
+        json.dump([list(col) for col in columns], file, indent=1)
+    os.replace(temp_file, _cache_file(backend, table))
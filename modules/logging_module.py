@@ -16,6 +16,16 @@ def setup_logger(name, log_file, level="CRITICAL"):
 
     return logger
 
+def get_logger(name, log_file):
+    # Returns a logger created by setup_logger. Worker processes that did not inherit it append to its log file
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.FileHandler("logs/"+log_file, 'a')
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+    return logger
+
 def set_logging_level(logger, level):
     logger.setLevel(level)
     return logger
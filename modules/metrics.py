@@ -0,0 +1,97 @@
+"""
+This module measures the duration of the phases of a run (e.g. connect, schema, introspection, generation and load),
+the time spent generating every column and the rows per second of every chunk.
+The measures are written to the log file of the backend and, at the end of the run, to logs/<backend>_metrics.json.
+It is used in conjunction with the 'pipeline', 'bigquery', 'mysql_dg', 'postgresql' and 'filesink' modules.
+For more information, see the section on Logging in README.md
+
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from modules import logging_module
+
+
+class Metrics:
+    """
+    The measures of a run of a backend. Metrics are picklable, so that every worker process measures its own chunks
+    and columns and sends them back to be merged. Generation and load times are summed over all worker processes.
+    """
+
+    def __init__(self, backend, logger_name, log_file):
+        self.backend, self.logger_name, self.log_file = backend, logger_name, log_file
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.phases, self.columns, self.chunks = {}, {}, []
+
+    def fork(self):
+        # Returns empty metrics of the same run, to be filled by a worker process and merged back
+        return Metrics(self.backend, self.logger_name, self.log_file)
+
+    @property
+    def logger(self):
+        return logging_module.get_logger(self.logger_name, self.log_file)
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        # Measures the block as the phase 'name'
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - began
+            self.add_phase(name, seconds)
+            self.logger.info("Phase '" + name + "' took " + format(seconds, ".3f") + " seconds.")
+
+    def chunk(self, first, rows, generate_seconds, load_seconds):
+        rows_per_sec = rows / (generate_seconds + load_seconds or 1e-9)
+        self.chunks.append({"first": first, "rows": rows, "generate_seconds": generate_seconds,
+                            "load_seconds": load_seconds, "rows_per_sec": rows_per_sec})
+        self.add_phase("generation", generate_seconds)
+        self.add_phase("load", load_seconds)
+        self.logger.debug("Chunk of " + str(rows) + " rows from row " + str(first) + ": generated in " +
+                          format(generate_seconds, ".3f") + "s, loaded in " + format(load_seconds, ".3f") + "s (" +
+                          str(round(rows_per_sec)) + " rows/sec).")
+
+    def add_columns(self, timings):
+        for column, seconds in timings.items():
+            self.columns[column] = self.columns.get(column, 0) + seconds
+
+    def merge(self, other):
+        # Adds the measures of a worker process
+        for name, seconds in other.phases.items():
+            self.add_phase(name, seconds)
+        self.add_columns(other.columns)
+        self.chunks.extend(other.chunks)
+
+    def summary(self):
+        rows = sum(chunk["rows"] for chunk in self.chunks)
+        # The pipeline phase is the wall time of generation and load, which run in parallel with several workers
+        seconds = self.phases.get("pipeline") or self.phases.get("generation", 0) + self.phases.get("load", 0)
+        return {
+            "backend": self.backend,
+            "started": self.started,
+            "rows": rows,
+            "rows_per_sec": rows / seconds if seconds else None,
+            "phases": self.phases,
+            # The columns that took the longest to generate first
+            "columns": dict(sorted(self.columns.items(), key=lambda item: item[1], reverse=True)),
+            "chunks": sorted(self.chunks, key=lambda chunk: chunk["first"]),
+        }
+
+    def write(self):
+        # Logs the phases and the slowest columns and writes all the measures to logs/<backend>_metrics.json
+        summary = self.summary()
+        logger = self.logger
+        logger.info("Phases (seconds): " + ", ".join(name + "=" + format(seconds, ".3f")
+                                                     for name, seconds in summary["phases"].items()))
+        logger.info("Slowest columns (seconds): " + ", ".join(column + "=" + format(seconds, ".3f")
+                                                              for column, seconds in
+                                                              list(summary["columns"].items())[:5]))
+        with open(os.path.join("logs", self.backend + "_metrics.json"), "w") as file:
+            json.dump(summary, file, indent=1)
@@ -8,22 +8,201 @@ import os
 import re
 import traceback
 
-import pandas as pd
 import mysql.connector
 
 from configparser import ConfigParser
-from sqlalchemy import create_engine
-from config.definitions import ROOT_DIR, MYSQL
-from modules import mysqlhelper, logging_module, exit_messages
-from modules.data_generation_exceptions import cannotBeEvaluated
+from contextlib import contextmanager
+from functools import partial
+from config.definitions import ROOT_DIR, MYSQL, CHUNK_SIZE, BIGINT_RANGE
+from modules import mysqlhelper, mysqlloader, column_plan, faker_index, introspection, pipeline, scheduler, \
+    uniqueness, logging_module, exit_messages
+from modules.checkpoint import checkpoint_path, open_checkpoint
+from modules.data_generation_exceptions import tableDoesNotExist, cannotBeEvaluated
+from modules.metrics import Metrics
 
 sql = mysqlhelper
 configParser = ConfigParser()
 
+# The 'mysqlhelper' functions (and their arguments) for the data types of MySQL columns
+TYPE_FUNCS = {
+    "tinyint": ("int_range", -128, 128),
+    "smallint": ("int_range", -32768, 32768),
+    "mediumint": ("int_range", -8388608, 8388608),
+    "int": ("integer",),
+    "integer": ("integer",),
+    "bigint": ("int_range", -BIGINT_RANGE, BIGINT_RANGE),
+    "float": ("float_value",),
+    "double": ("float_value",),
+    "year": ("int_range", 1901, 2156),
+    "date": ("date_value",),
+    "time": ("time_value",),
+    "datetime": ("date_time_",),
+    "timestamp": ("date_time_",),
+    "geometry": ("point_data",),
+    "point": ("point_data",),
+}
+INTEGER_TYPES = ("tinyint", "smallint", "mediumint", "int", "integer", "bigint")
+NUMERIC_TYPES = ("decimal", "float", "double")
+STRING_TYPES = ("char", "varchar", "tinytext", "text", "mediumtext", "longtext")
+BINARY_TYPES = ("binary", "varbinary", "tinyblob", "blob", "mediumblob", "longblob")
+
+
+@contextmanager
+def open_loader(user_id, password_id, host_id, database_id, table_id, load_mode, batch_size, expressions=None):
+    # Opens a connection that loads generated chunks into the table, every worker process opens its own
+    # Columns with an expression (see 'mysqlloader') are converted by MySQL, e.g. WKT text into geometries
+    if load_mode == 'to_sql':
+        # pandas and SQLAlchemy are only imported by the to_sql load mode
+        import pandas as pd
+        from sqlalchemy import create_engine
+
+        sql_conn = "mysql+pymysql://"+user_id+":"+password_id+"@"+host_id+":3306/"+database_id
+        engine = create_engine(sql_conn)
+        method = mysqlloader.to_sql_method(expressions)
+
+        def load_chunk(first, data):
+            dataframe = pd.DataFrame({column: mysqlloader.driver_values(values) for column, values in data.items()})
+            dataframe.to_sql(name=table_id, con=engine, if_exists='append', index=False,
+                             method=method)  # Make an API request.
+
+        try:
+            yield load_chunk
+        finally:
+            engine.dispose()
+        return
+
+    cnx = mysql.connector.connect(user=user_id, password=password_id, host=host_id, database=database_id, port=3306,
+                                  allow_local_infile=(load_mode == 'load_data'))
+
+    def load_chunk(first, data):
+        if load_mode == 'load_data':
+            mysqlloader.load_data_chunk(cnx, table_id, data, expressions)
+        else:
+            mysqlloader.insert_chunk(cnx, table_id, data, batch_size, expressions)
+
+    try:
+        yield load_chunk
+    finally:
+        cnx.close()
+
+
+def fetch_columns(cursor, database_id, table_id):
+    # Fetches the name, data type, length, precision, scale and nullability of every column in a single query
+    cursor.execute("SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, "
+                   "is_nullable FROM INFORMATION_SCHEMA.COLUMNS WHERE table_schema = %s AND table_name = %s "
+                   "ORDER BY ordinal_position", (database_id, table_id))
+    # 'fetchall()' method fetches all the rows from the last executed statement
+    return [introspection.column(*row) for row in cursor.fetchall()]
+
+
+def fetch_foreign_keys(cursor, database_id):
+    # Fetches the (table, column, parent table, parent column) of every foreign key of the database in a single query
+    cursor.execute("SELECT table_name, column_name, referenced_table_name, referenced_column_name "
+                   "FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE WHERE table_schema = %s "
+                   "AND referenced_table_name IS NOT NULL", (database_id,))
+    return [tuple(introspection.text(value) for value in row) for row in cursor.fetchall()]
+
+
+def add_column(plan, column, table):
+    # Adds the 'mysqlhelper' function for a column to the plan according to its data type and its name
+    col_name = column.name
+    name = col_name.lower()
+    data_type = column.data_type
+
+    if data_type in INTEGER_TYPES and 'id' in name:
+        plan.add(col_name, column_plan.ID, 1)
+
+    elif data_type == "tinyint" and 'bool' in name:
+        plan.add(col_name, "boolean_data")
+
+    elif data_type in NUMERIC_TYPES and ('latitude' in name or 'longitude' in name):
+        plan.add(col_name, "lat_lng", name)
+
+    elif data_type == "json":
+        plan.add(col_name, column_plan.FAKER, "json")
+
+    elif data_type == "decimal":
+        plan.add(col_name, "numeric", column.precision, column.scale)
+
+    elif data_type in TYPE_FUNCS:
+        plan.add(col_name, *TYPE_FUNCS[data_type])
+
+    elif data_type in BINARY_TYPES:
+        plan.add(col_name, "bytes_value", column.length)
+
+    elif data_type in STRING_TYPES:
+        if 'mobile' in name or 'phone' in name:
+            plan.add(col_name, "mobile", column.length)
+        elif 'text' in name or 'string' in name:
+            # Text columns are generated in bulk, see the 'text_engine' module
+            plan.add(col_name, "text", column.length)
+        else:
+            try:
+                faker_func = sql.find_faker_func(name, table)
+            except cannotBeEvaluated:
+                faker_func = None
+            if faker_func is None or faker_func in faker_index.LOREM_PROVIDERS:
+                plan.add(col_name, "text", column.length)
+            else:
+                plan.add(col_name, column_plan.FAKER, faker_func, column.length)
+
+    else:
+        add_column_by_name(plan, column, table)
+
+
+def add_column_by_name(plan, column, table):
+    # Adds the 'mysqlhelper' function for a column of an unsupported data type according to the column name
+    col_name = column.name
+
+    if 'id' in col_name:
+        plan.add(col_name, column_plan.ID, 1)
+
+    elif 'latitude' in col_name or 'longitude' in col_name:
+        plan.add(col_name, "lat_lng", col_name)
+
+    elif 'geography' in col_name or 'geometry' in col_name or 'point' in col_name:
+        plan.add(col_name, "point_data")
+
+    elif 'int' in col_name:
+        plan.add(col_name, "integer")
+
+    elif 'blob_data' in col_name:
+        plan.add(col_name, "bytes_value")
+
+    elif re.match(r"\w*big_*num\w*", col_name) or re.match(r"\w*big_*int\w*", col_name):
+        plan.add(col_name, "big_num_")
+
+    elif 'numeric' in col_name or 'decimal' in col_name:
+        plan.add(col_name, "numeric")
+
+    elif 'float' in col_name:
+        plan.add(col_name, "float_value")
+
+    elif re.match(r"\w*date_*time\w*", col_name) or re.match(r"\w*time_*stamp\w*", col_name):
+        plan.add(col_name, "date_time_")
+
+    elif 'time' in col_name and 'timestamp' not in col_name:
+        plan.add(col_name, "time_value")
+
+    elif 'bool' in col_name:
+        plan.add(col_name, "boolean_data")
+
+    elif 'string' in col_name or 'text' in col_name:
+        plan.add(col_name, "text", column.length)
+
+    elif 'bytes' in col_name:
+        plan.add(col_name, "bytes_value")
+
+    elif 'mobile' in col_name or 'phone' in col_name:
+        plan.add(col_name, "mobile", column.length)
+
+    else:
+        plan.add(col_name, column_plan.FAKER, sql.find_faker_func(col_name, table), column.length)
+
 
 def main():
     
-    errors_raised, cnx, engine = False, None, None
+    errors_raised, cnx = False, None
     # Set up a logger for the mysql module
     mysql_logger = logging_module.setup_logger('mysql_logger', 'mysql.log', 'CRITICAL')
     configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
@@ -43,125 +222,148 @@ def main():
     schema_update = int(configParser.get(MYSQL, 'Schema_update'))
     schema_update_query = configParser.get(MYSQL, 'Schema_update_query')
     loglevel = configParser.get(MYSQL, 'LogLevel')
+    load_mode = configParser.get(MYSQL, 'LoadMode', fallback='to_sql').lower() or 'to_sql'
+    batch_size = int(configParser.get(MYSQL, 'BatchSize', fallback='') or 1000)
+    chunk_size = int(configParser.get(MYSQL, 'ChunkSize', fallback='') or CHUNK_SIZE)
+    workers = int(configParser.get(MYSQL, 'Workers', fallback='') or 1)
+    queue_depth = int(configParser.get(MYSQL, 'QueueDepth', fallback='') or 2)
+    load_workers = int(configParser.get(MYSQL, 'LoadWorkers', fallback='') or 1)
+    seed = int(configParser.get(MYSQL, 'Seed', fallback='') or pipeline.new_seed())
+    pool_size = int(configParser.get(MYSQL, 'FakerPoolSize', fallback='') or 0)
+    pool_refresh = int(configParser.get(MYSQL, 'FakerPoolRefresh', fallback='') or 0)
+    unique_columns = uniqueness.parse(configParser.get(MYSQL, 'UniqueColumns', fallback=''))
     # Change the log level to the level entered by user
     if loglevel is not None:
         mysql_logger = logging_module.set_logging_level(mysql_logger, loglevel)
 
     mysql_logger.info("Entered MySQL module: Data Generation Process for MySQL has begun.")
+    metrics = Metrics("mysql", 'mysql_logger', 'mysql.log')
+
+    # Start a checkpoint file recording the committed chunks, or continue the run of the previous checkpoint file
+    checkpoint = open_checkpoint(checkpoint_path("mysql", host_id + "." + database_id),
+                                 configParser.get(MYSQL, 'Resume', fallback='0') == '1', seed, chunk_size, mysql_logger)
+    seed, chunk_size = checkpoint.seed, checkpoint.chunk_size
+    resumed = bool(checkpoint.committed)
     
     # Creating MySQL connection
-    try:
-        cnx = mysql.connector.connect(user=user_id, password=password_id, host=host_id, database=database_id, port=3306)
-        sql_conn = "mysql+pymysql://"+user_id+":"+password_id+"@"+host_id+":3306/"+database_id
-        engine = create_engine(sql_conn)
+    with metrics.phase("connect"):
+        try:
+            cnx = mysql.connector.connect(user=user_id, password=password_id, host=host_id, database=database_id,
+                                          port=3306)
     
-    except (Exception,):
-        mysql_logger.critical("An error has occurred while connecting to MySQL database: " + traceback.format_exc())
-        exit_messages.error_exit()
+        except (Exception,):
+            mysql_logger.critical("An error has occurred while connecting to MySQL database: " + traceback.format_exc())
+            exit_messages.error_exit()
 
     cursor = cnx.cursor()
 
     # Create/replace the table according to the schema entered by the user if schema is not empty
-    if schema != "":
-        try:
-            cursor.execute(schema)
-            mysql_logger.debug("Creating schema according to config file was successful.")
-        except mysql.connector.Error as error:
-            mysql_logger.critical("ERROR while creating schema from config file: {}".format(error))
-            exit_messages.error_exit()
-
-    if schema_update == 1:
-        try:
-            cursor.execute("""TRUNCATE table """+table_id+"""""")
-            cursor.execute(schema_update_query)
-        except mysql.connector.Error as error:
-            mysql_logger.critical("ERROR while updating existing schema from config file: {}".format(error))
-            exit_messages.error_exit()
-            
-    # Fetch the fields from the newly created/replaced table or using the table_id key
-    # executing the statement using 'execute()' method
-    try:
-        cursor.execute("""SELECT column_name FROM INFORMATION_SCHEMA.COLUMNS where table_name ='"""+table_id+"""'""")
-    except mysql.connector.Error as error:
-        mysql_logger.critical("ERROR: {}".format(error))
-        exit_messages.error_exit()
-
-    # 'fetchall()' method fetches all the rows from the last executed statement
-    table_schema = cursor.fetchall()
+    # A resumed run keeps the table and the rows committed by the previous run
+    with metrics.phase("schema"):
+        if resumed:
+            mysql_logger.info("The table schema is not created or updated when a run is resumed.")
+        elif schema != "":
+            try:
+                cursor.execute(schema)
+                mysql_logger.debug("Creating schema according to config file was successful.")
+            except mysql.connector.Error as error:
+                mysql_logger.critical("ERROR while creating schema from config file: {}".format(error))
+                exit_messages.error_exit()
 
-    data = {}
-    rows_to_insert = pd.DataFrame()
-    mysql_logger.debug("Fetching the relevant functions from the 'mysqlhelper' module...")
-    id_count = 1
-    # Generate records using the 'mysqlhelper' module
-    for i in range(n_record):
-        for j in range(len(table_schema)):
-            col_name = sql.get_str(table_schema[j])
-
-            if 'id' in col_name:
-                data[col_name] = id_count
-                id_count += 1
-
-            elif 'latitude' in col_name or 'longitude' in col_name:
-                data[col_name] = sql.lat_lng(col_name)
-
-            elif 'geography' in col_name or 'geometry' in col_name or 'point' in col_name:
-                data[col_name] = sql.point_data()
-
-            elif 'int' in col_name:
-                data[col_name] = sql.integer()
+        if schema_update == 1 and not resumed:
+            try:
+                cursor.execute("""TRUNCATE table """+table_id+"""""")
+                cursor.execute(schema_update_query)
+            except mysql.connector.Error as error:
+                mysql_logger.critical("ERROR while updating existing schema from config file: {}".format(error))
+                exit_messages.error_exit()
             
-            elif 'blob_data' in col_name:
-                data[col_name] = sql.bytes_value()
-
-            elif re.match(r"\w*big_*num\w*", col_name) or re.match(r"\w*big_*int\w*", col_name):
-                data[col_name] = sql.big_num_()
+    # Fetch the columns of every table from the newly created/replaced table or using the Table or Tables keys,
+    # or from the local cache, and the foreign keys of the database
+    tables = [table.strip() for table in (configParser.get(MYSQL, 'Tables', fallback='') or table_id).split(",")
+              if table.strip()]
+    counts = scheduler.parse_counts(configParser.get(MYSQL, 'RecordCounts', fallback=''), n_record)
+    table_columns = {}
+    with metrics.phase("introspection"):
+        for table in tables:
+            table_name = database_id + "." + table
+            columns = None
+            if configParser.get(MYSQL, 'SchemaCache', fallback='0') == '1' and schema == "" and schema_update != 1:
+                columns = introspection.load("mysql", table_name)
 
-            elif 'numeric' in col_name or 'decimal' in col_name:
-                data[col_name] = sql.numeric()
-
-            elif 'float' in col_name:
-                data[col_name] = sql.float_value()
-
-            elif re.match(r"\w*date_*time\w*", col_name) or re.match(r"\w*time_*stamp\w*", col_name):
-                res = sql.date_time_()
-                data[col_name] = str(res) 
-
-            elif 'time' in col_name and 'timestamp' not in col_name:
-                data[col_name] = sql.time_value()
-
-            elif 'bool' in col_name:
-                data[col_name] = sql.boolean_data()
+            if columns is None:
+                try:
+                    columns = fetch_columns(cursor, database_id, table)
+                except mysql.connector.Error as error:
+                    mysql_logger.critical("ERROR: {}".format(error))
+                    exit_messages.error_exit()
+                if columns:
+                    introspection.store("mysql", table_name, columns)
 
-            elif 'string' in col_name or 'text' in col_name:
-                data[col_name] = sql.text()
+            if not columns:
+                try:
+                    raise tableDoesNotExist(table_name)
+                except tableDoesNotExist as e:
+                    mysql_logger.critical(e.message)
+                    exit_messages.error_exit()
+            table_columns[table] = columns
 
-            elif 'bytes' in col_name:
-                data[col_name] = sql.bytes_value()
+        try:
+            foreign_keys = fetch_foreign_keys(cursor, database_id)
+        except mysql.connector.Error as error:
+            mysql_logger.critical("ERROR: {}".format(error))
+            exit_messages.error_exit()
 
-            elif 'mobile' in col_name or 'phone' in col_name:
-                data[col_name] = sql.mobile()
+    mysql_logger.debug("Fetching the relevant functions from the 'mysqlhelper' module...")
+    parents = scheduler.dependencies(tables, foreign_keys)
+    plans = {}
+    # Compile the 'mysqlhelper' functions for every column into the plan of every table once, before generating any
+    # rows. Parents come first so that foreign key columns are sampled from the keys generated for their parents
+    with metrics.phase("resolution"):
+        try:
+            order = scheduler.topological_order(parents)
+        except ValueError as e:
+            mysql_logger.critical(str(e))
+            exit_messages.error_exit()
 
-            else:
+        for table in order:
+            plan = column_plan.ColumnPlan(sql, pool_size=pool_size, pool_refresh=pool_refresh,
+                                          unique=uniqueness.limits(table_columns[table], unique_columns, table))
+            for column in table_columns[table]:
                 try:
-                    data[col_name] = sql.fake_data(col_name)
+                    uniqueness.check(column, unique_columns, table, counts(table))
+                    if not scheduler.add_reference(plan, column.name, table, foreign_keys, plans, counts):
+                        add_column(plan, column, database_id + "." + table)
                 except cannotBeEvaluated as e:
                     mysql_logger.error(e.message)
                     errors_raised = True
+            plans[table] = plan
 
-            data[col_name] = [data[col_name]]
-   
-        # Append newly generated row to the existing DataFrame
-        rows_to_insert = pd.concat([rows_to_insert, pd.DataFrame(data)], ignore_index=True)
-  
-    # Load the DataFrame to mysql table using to_sql method
-    mysql_logger.debug("Data generation complete (for batch-loading)!")
+        faker_index.save()
+
+    # Generate the records of every table in chunks of columns and append every chunk to its table using the load mode
+    mysql_logger.debug("Evaluating 'mysqlhelper' functions to generate data...")
+    mysql_logger.info("Generating data for " + str(len(tables)) + " table(s) with " + str(workers) +
+                      " worker(s) and seed " + str(seed) + ".")
+    for table in tables:
+        if checkpoint.rows(table):
+            mysql_logger.info(str(checkpoint.rows(table)) + " rows of " + table + " were committed by the previous "
+                              "run and are skipped.")
+    jobs = {table: (plans[table], counts(table), chunk_size,
+                    partial(open_loader, user_id, password_id, host_id, database_id, table, load_mode, batch_size,
+                            mysqlloader.column_expressions(table_columns[table])),
+                    not scheduler.references_itself(table, foreign_keys)) for table in tables}
     try:
-        rows_to_insert.to_sql(name=table_id, con=engine, if_exists='append', index=False)  # Make an API request.
+        with metrics.phase("pipeline"):
+            scheduler.run(jobs, parents, workers, seed, metrics, queue_depth, load_workers, checkpoint)
     except (Exception,):
         mysql_logger.error("There was an error while batch-loading data mysql: " + traceback.format_exc())
+        mysql_logger.error("Set Resume = 1 to continue the run from the checkpoint file " + checkpoint.path + ".")
         exit_messages.error_exit()
+    checkpoint.remove()
 
+    mysql_logger.debug("Data generation complete (for batch-loading)!")
+    metrics.write()
     mysql_logger.debug("Data generation process for MySQL is now complete!")
     
     return errors_raised
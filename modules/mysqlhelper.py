@@ -5,65 +5,133 @@ For more information, see the section on MySQL in README.md
 
 """
 import random as r
-from faker import Faker
-from datetime import time
+import numpy as np
 from config.definitions import BIGINT_RANGE, INT_RANGE_MYSQL, CANNOT_BE_EVALUATED_ERROR, LOCALE
-import os
+from modules import binary, faker_index, geo, temporal, text_engine
+from modules.faker_context import fake
 from modules.data_generation_exceptions import cannotBeEvaluated
 
-fake = Faker(locale=LOCALE)
-Faker.seed(99)
+rng = np.random.default_rng()
 
 
-def big_num_():
-    return r.uniform(-BIGINT_RANGE, BIGINT_RANGE)
+def seed(value):
+    # Seeds the shared Faker instance and the random generators used by this module
+    global rng
+    fake.seed_instance(value)
+    r.seed(value)
+    rng = np.random.default_rng(value)
 
 
-def integer():
-    return int(r.uniform(-INT_RANGE_MYSQL, INT_RANGE_MYSQL))
+# The numeric functions below return a single value when called without arguments and a whole column
+# (a NumPy array of n values) when called with a row count, e.g. integer(1000)
 
 
-def float_value():
-    return float(r.random())
+def big_num_(n=None):
+    if n is None:
+        return r.uniform(-BIGINT_RANGE, BIGINT_RANGE)
+    return rng.uniform(-BIGINT_RANGE, BIGINT_RANGE, n)
 
 
-def time_value():
-    values = list(map(int, fake.time().split(":")))
-    return time(values[0], values[1], values[2])
+def int_range(low, high, n=None):
+    # Returns integers from low (inclusive) to high (exclusive), e.g. for smallint columns
+    if n is None:
+        return r.randrange(low, high)
+    return rng.integers(low, high, n, dtype=np.int64)
 
 
-def text():
-    return fake.text()
+def integer(n=None):
+    if n is None:
+        return int(r.uniform(-INT_RANGE_MYSQL, INT_RANGE_MYSQL))
+    return rng.integers(-INT_RANGE_MYSQL, INT_RANGE_MYSQL, n, dtype=np.int64)
+
+
+def numeric(precision=None, scale=None, n=None):
+    # Values of DECIMAL(precision, scale) columns, or values from 0 to 1 if the precision is not declared
+    if precision is None:
+        return float(r.random()) if n is None else rng.random(n)
+    bound = 10 ** (precision - (scale or 0))
+    values = rng.uniform(-bound, bound, 1 if n is None else n)
+    # Values are cut to scale decimals toward zero, so that no value is rounded up to the bound
+    values = np.trunc(values * 10 ** (scale or 0)) / 10 ** (scale or 0)
+    return float(values[0]) if n is None else values
+
+
+def float_value(n=None):
+    if n is None:
+        return float(r.random())
+    return rng.random(n)
+
+
+def time_value(n=None):
+    # Times of day, see the 'temporal' module
+    if n is None:
+        return temporal.times(rng, 1)[0]
+    return temporal.times(rng, n)
+
+
+def text(max_chars=None, n=None):
+    # Sentences of up to max_chars characters, see the 'text_engine' module
+    if n is None:
+        return text_engine.sentences(rng, 1, max_chars)[0]
+    return text_engine.sentences(rng, n, max_chars)
 
 
 def lat_lng(col_name1):
-    col_data = "fake." + col_name1 + '()'
-    return float(eval(col_data))
+    return float(fake.latitude() if 'latitude' in col_name1 else fake.longitude())
 
 
-def bytes_value():
-    return os.urandom(10)
+def bytes_value(max_length=None, n=None):
+    # Random binary and BLOB values, see the 'binary' module
+    if n is None:
+        return binary.values(rng, 1, max_length).to_bytes()[0]
+    return binary.values(rng, n, max_length)
 
 
-def date_time_():
-    return fake.date_time()
+def date_value(n=None):
+    # Dates in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.dates(rng, 1).tolist()[0]
+    return temporal.dates(rng, n)
+
+
+def date_time_(n=None):
+    # Timestamps without timezone in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.datetimes(rng, 1).tolist()[0]
+    return temporal.datetimes(rng, n)
+
+
+def point_data(n=None):
+    # WKT points on land, see the 'geo' module
+    if n is None:
+        return geo.points(rng, 1)[0]
+    return geo.points(rng, n)
 
 
 def boolean_data():
     return r.choice([True, False])
 
 
-def mobile():
-    return fake.phone_number()
+def mobile(max_length=None):
+    # Phone numbers are cut to the maximum length of their column, e.g. for numbers with a country code
+    return fake.phone_number()[:max_length]
 
 
 def get_str(col_str):
     return str(list(col_str)).strip("[]").strip("''")
 
 
-def fake_data(col_name):
-    for elem in dir(fake):
-        if elem in col_name:
-            return str(eval("fake." + elem + "()"))
-    print(col_name+": "+CANNOT_BE_EVALUATED_ERROR)
+def find_faker_func(col_name, table=None):
+    # Returns the longest Faker function name contained in the column name, see the 'faker_index' module
+    elem = faker_index.find(fake, LOCALE, col_name, table)
+    if elem is not None:
+        return elem
     raise cannotBeEvaluated(col_name)
+
+
+def fake_data(col_name):
+    try:
+        return str(getattr(fake, find_faker_func(col_name))())
+    except cannotBeEvaluated:
+        print(col_name+": "+CANNOT_BE_EVALUATED_ERROR)
+        raise
@@ -0,0 +1,140 @@
+"""
+This module loads generated data into MySQL tables using the mysql.connector connection.
+It supports LOAD DATA LOCAL INFILE from a temporary file and batched multi-row INSERT statements.
+It is used in conjunction with the 'mysql_dg' module.
+For more information, see the section on MySQL in README.md
+
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from modules.binary import BinaryColumn
+
+NULL = b"\\N"
+# Bytes that have to be escaped with a backslash in a LOAD DATA file
+ESCAPES = {b"\\": b"\\\\", b"\t": b"\\t", b"\n": b"\\n", b"\0": b"\\0"}
+ESCAPED_BYTES = [ord(char) for char in ESCAPES]
+# The expressions converting the loaded values of columns of these data types, e.g. WKT text into geometries
+TYPE_EXPRESSIONS = {
+    "geometry": "ST_GeomFromText({})",
+    "point": "ST_GeomFromText({})",
+    "json": "CONVERT({} USING utf8mb4)",
+}
+
+
+def escape(value):
+    for char, escaped in ESCAPES.items():
+        value = value.replace(char, escaped)
+    return value
+
+
+def encode_value(value):
+    # Returns a single value as a field of a LOAD DATA file
+    if value is None:
+        return NULL
+    if isinstance(value, (bool, np.bool_)):
+        return b"1" if value else b"0"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return escape(bytes(value))
+    return escape(str(value).encode("utf-8"))
+
+
+def encode_binary(values):
+    # Escapes the buffer of a binary column at once and returns the escaped values as fields of a LOAD DATA file
+    buffer = np.frombuffer(values.buffer, dtype=np.uint8)
+    # Every escaped byte takes two bytes, so every value moves by the number of escaped bytes before it
+    shifts = np.zeros(len(buffer) + 1, dtype=np.int64)
+    np.cumsum(np.isin(buffer, ESCAPED_BYTES), out=shifts[1:])
+    bounds = (values.offsets + shifts[values.offsets]).tolist()
+    escaped = escape(values.buffer)
+    return [escaped[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def driver_values(values):
+    # mysql.connector and PyMySQL do not accept memoryview values
+    return values.to_bytes() if isinstance(values, BinaryColumn) else values
+
+
+def encode_column(values):
+    # Returns all the values of a column as fields of a LOAD DATA file
+    if isinstance(values, BinaryColumn):
+        return encode_binary(values)
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "b":
+            return np.where(values, b"1", b"0").tolist()
+        if values.dtype.kind in "iuf":
+            return values.astype(bytes).tolist()
+        if values.dtype.kind == "M":
+            # Dates and datetimes, as generated by the 'temporal' module
+            return np.char.replace(np.datetime_as_string(values), "T", " ").astype(bytes).tolist()
+        values = values.tolist()
+    return [encode_value(value) for value in values]
+
+
+def column_expressions(columns):
+    # Returns the expressions of the columns whose loaded values are converted, as {column name: expression}
+    return {column.name: TYPE_EXPRESSIONS[column.data_type] for column in columns
+            if column.data_type in TYPE_EXPRESSIONS}
+
+
+def load_data_columns(data, expressions):
+    # Returns the column list and SET clause of LOAD DATA, converted columns are read into user variables first
+    fields, assignments = [], []
+    for index, column in enumerate(data.keys()):
+        if column in expressions:
+            fields.append("@v" + str(index))
+            assignments.append("`" + column + "` = " + expressions[column].format("@v" + str(index)))
+        else:
+            fields.append("`" + column + "`")
+    return " (" + ", ".join(fields) + ")" + (" SET " + ", ".join(assignments) if assignments else "")
+
+
+def insert_query(table, columns, expressions):
+    # Returns the INSERT statement of the columns, the placeholders of converted columns are put in their expression
+    placeholders = [expressions[column].format("%s") if column in expressions else "%s" for column in columns]
+    return "INSERT INTO " + table + " (" + ", ".join("`" + column + "`" for column in columns) + ") VALUES (" + \
+        ", ".join(placeholders) + ")"
+
+
+def to_sql_method(expressions):
+    # Returns the 'method' of DataFrame.to_sql() inserting the rows with insert_query, or None if no column is converted
+    if not expressions:
+        return None
+
+    def insert(pd_table, conn, keys, data_iter):
+        conn.exec_driver_sql(insert_query(pd_table.name, keys, expressions), list(data_iter))
+    return insert
+
+
+def load_data_chunk(cnx, table, data, expressions=None):
+    # Writes a dictionary of generated columns to a temporary file and loads it with LOAD DATA LOCAL INFILE
+    columns = [encode_column(values) for values in data.values()]
+    with tempfile.NamedTemporaryFile("wb", suffix=".tsv", delete=False) as file:
+        file.writelines(b"\t".join(row) + b"\n" for row in zip(*columns))
+
+    try:
+        cursor = cnx.cursor()
+        # The file is written as raw bytes, so no character set conversion is applied while loading it
+        cursor.execute("LOAD DATA LOCAL INFILE '" + file.name.replace("\\", "/") + "' INTO TABLE " + table +
+                       " CHARACTER SET binary FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n'" +
+                       load_data_columns(data, expressions or {}))
+        cnx.commit()
+        cursor.close()
+    finally:
+        os.remove(file.name)
+
+
+def insert_chunk(cnx, table, data, batch_size, expressions=None):
+    # Inserts a dictionary of generated columns with multi-row INSERT statements of batch_size rows
+    columns = [values.tolist() if isinstance(values, np.ndarray) else driver_values(values) for values in data.values()]
+    rows = list(zip(*columns))
+    query = insert_query(table, data.keys(), expressions or {})
+
+    cursor = cnx.cursor()
+    for start in range(0, len(rows), batch_size):
+        # mysql.connector rewrites executemany() on an INSERT statement into a single multi-row INSERT
+        cursor.executemany(query, rows[start:start + batch_size])
+    cnx.commit()
+    cursor.close()
@@ -0,0 +1,158 @@
+"""
+This module generates the data of a table in fixed-size chunks and hands every chunk to a loader.
+Only a few chunks are held in memory at a time, so the memory used does not depend on the record count.
+The record count can be split into contiguous id ranges (shards) that are generated and loaded by separate
+worker processes. Every chunk is generated with its own random state, seeded from a base seed and the index of the
+chunk, so the values of a chunk do not depend on the number of workers and a resumed run generates the same values.
+Within a worker, chunks can be loaded by loader threads while the next chunks are generated.
+It is used in conjunction with the 'bigquery', 'mysql_dg' and 'postgresql' modules.
+
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def new_seed():
+    # Returns a random base seed, used when no seed is set in the config file
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def shard_seed(seed, shard):
+    # Derives a deterministic seed for a shard (a table or a chunk) from the base seed and the index of the shard
+    return int(np.random.SeedSequence([seed, shard]).generate_state(1)[0])
+
+
+def shards(n_record, workers, chunk_size=1):
+    # Splits n_record rows into contiguous (first row index, row count) ranges of whole chunks, one per worker
+    # Shards start at a multiple of chunk_size, so the chunks are the same whatever the number of workers
+    size, remainder = divmod(-(-n_record // chunk_size), workers)
+    first = 0
+    for shard in range(workers):
+        count = min((size + (1 if shard < remainder else 0)) * chunk_size, n_record - first)
+        yield first, count
+        first += count
+
+
+def chunks(plan, n_record, chunk_size, start=0, seed=None, checkpoint=None):
+    # Yields the index of the first row and the generated columns of every chunk of n_record rows
+    # If seed is set, every chunk is generated with the seed of its index, chunks committed in checkpoint are skipped
+    stop = start + n_record
+    for first in range(start, stop, chunk_size):
+        rows = min(chunk_size, stop - first)
+        if checkpoint is not None and checkpoint.is_committed(first, rows):
+            continue
+        if seed is not None:
+            plan.seed(shard_seed(seed, first // chunk_size), seed, first // chunk_size)
+        yield first, plan.generate(first, rows)
+
+
+def load_queued(plan, first, n_record, chunk_size, loader, seed, metrics, checkpoint, queue_depth, load_workers):
+    """
+    Generates the chunks of the rows first to first + n_record - 1 in the calling thread while load_workers threads,
+    each with its own loader, load them. Up to queue_depth generated chunks wait for a loader, generation waits when
+    the queue is full so that it never runs ahead of loading by more than queue_depth chunks.
+    """
+    chunk_queue = queue.Queue(maxsize=queue_depth)
+    errors, lock = [], threading.Lock()
+
+    def load():
+        finished = False
+        try:
+            with loader() as load_chunk:
+                while not finished:
+                    item = chunk_queue.get()
+                    finished = item is None
+                    if finished or errors:
+                        continue
+                    start, data, generate_seconds = item
+                    began = time.perf_counter()
+                    load_chunk(start, data)
+                    loaded = time.perf_counter()
+                    rows = min(chunk_size, first + n_record - start)
+                    with lock:
+                        if checkpoint is not None:
+                            checkpoint.record(start, rows)
+                        if metrics is not None:
+                            metrics.chunk(start, rows, generate_seconds, loaded - began)
+        except BaseException as e:
+            errors.append(e)
+            # Keep taking chunks until the end, so that generation never waits for a failed loader
+            while not finished:
+                finished = chunk_queue.get() is None
+
+    threads = [threading.Thread(target=load) for _ in range(max(load_workers, 1))]
+    for thread in threads:
+        thread.start()
+    try:
+        began = time.perf_counter()
+        for start, data in chunks(plan, n_record, chunk_size, first, seed, checkpoint):
+            if errors:
+                break
+            chunk_queue.put((start, data, time.perf_counter() - began))
+            began = time.perf_counter()
+    finally:
+        for _ in threads:
+            chunk_queue.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+
+def run_shard(plan, first, n_record, chunk_size, loader, seed=None, metrics=None, queue_depth=0, load_workers=1,
+              checkpoint=None):
+    # Generates the rows first to first + n_record - 1 and loads every chunk with a loader opened by loader()
+    # Returns the number of rows loaded and the metrics, which are a copy in worker processes
+    if queue_depth:
+        load_queued(plan, first, n_record, chunk_size, loader, seed, metrics, checkpoint, queue_depth, load_workers)
+    else:
+        with loader() as load_chunk:
+            began = time.perf_counter()
+            for start, data in chunks(plan, n_record, chunk_size, first, seed, checkpoint):
+                generated = time.perf_counter()
+                load_chunk(start, data)
+                loaded = time.perf_counter()
+                rows = min(chunk_size, first + n_record - start)
+                if checkpoint is not None:
+                    checkpoint.record(start, rows)
+                if metrics is not None:
+                    metrics.chunk(start, rows, generated - began, loaded - generated)
+                began = loaded
+    if metrics is not None:
+        metrics.add_columns(plan.timings)
+    return n_record, metrics
+
+
+def run(plan, n_record, chunk_size, loader, workers=1, seed=None, metrics=None, queue_depth=0, load_workers=1,
+        checkpoint=None):
+    """
+    Generates n_record rows with the plan and loads them chunk by chunk.
+    'loader' is a picklable callable that returns a context manager yielding a load_chunk(first row index, columns)
+    function, so that every worker process can open its own connection. Errors raised by a loader are raised again
+    here. If metrics are given, the chunks and columns of every worker are measured in them.
+    If queue_depth is set, every worker loads its chunks with load_workers threads while it generates the next ones
+    (see load_queued). If a checkpoint is given, every loaded chunk is recorded in it and the chunks it holds are
+    skipped. Returns the number of rows of the table.
+    """
+    if workers <= 1:
+        return run_shard(plan, 0, n_record, chunk_size, loader, seed, metrics, queue_depth, load_workers,
+                         checkpoint)[0]
+
+    # Every chunk needs its own random state, otherwise the workers would generate the same values
+    seed = new_seed() if seed is None else seed
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_shard, plan, first, count, chunk_size, loader, seed,
+                                   None if metrics is None else metrics.fork(), queue_depth, load_workers, checkpoint)
+                   for first, count in shards(n_record, workers, chunk_size) if count]
+        loaded = 0
+        for future in futures:
+            count, shard_metrics = future.result()
+            loaded += count
+            if metrics is not None:
+                metrics.merge(shard_metrics)
+        return loaded
@@ -9,17 +9,43 @@ import re
 import traceback
 import psycopg2
 
-import pandas as pd
+from contextlib import contextmanager
+from functools import partial
+
 from configparser import ConfigParser
-from sqlalchemy import create_engine
 
-from config.definitions import ROOT_DIR, PGSQL
-from modules import postgresqlhelper, logging_module, exit_messages
+from config.definitions import ROOT_DIR, PGSQL, CHUNK_SIZE
+from modules import postgresqlhelper, postgresqlloader, column_plan, faker_index, introspection, pipeline, \
+    scheduler, uniqueness, logging_module, exit_messages
+from modules.checkpoint import checkpoint_path, open_checkpoint
 from modules.data_generation_exceptions import tableDoesNotExist, cannotBeEvaluated
+from modules.metrics import Metrics
 
 pgh = postgresqlhelper
+pgl = postgresqlloader
 configParser = ConfigParser()
 
+# The 'postgresqlhelper' functions (and their arguments) for the data types of PostgreSQL columns
+TYPE_FUNCS = {
+    "smallint": ("int_range", -32768, 32768),
+    "integer": ("int_value",),
+    "bigint": ("bigint",),
+    "real": ("numeric",),
+    "double precision": ("numeric",),
+    "boolean": ("boolean_data",),
+    "bytea": ("bytea_value",),
+    "inet": ("inet",),
+    "cidr": ("inet",),
+    "date": ("date_value",),
+    "time without time zone": ("time_value",),
+    "timestamp without time zone": ("timestamp",),
+    "timestamp with time zone": ("timestamp_with_zone",),
+}
+INTEGER_TYPES = ("smallint", "integer", "bigint")
+NUMERIC_TYPES = ("numeric", "real", "double precision")
+STRING_TYPES = ("text", "character varying", "character")
+
+
 # Below function fetches the PostgreSQL configuration options from config file
 def fetch_config(filename, section, logger):
     parameters = ("host", "port", "user", "password", "database")
@@ -42,176 +68,314 @@ def fetch_config(filename, section, logger):
     return db, dg_params
 
 
-def main():
-    conn, cur = None, None
-    rows_to_insert, results = [], None
-    errors_raised = False
+@contextmanager
+def open_loader(params, table, load_method):
+    # Opens a connection that loads generated chunks into the table, every worker process opens its own
+    if load_method == "insert":
+        # pandas and SQLAlchemy are only imported by the insert load method
+        import pandas as pd
+        from sqlalchemy import create_engine
 
-    # Set up a logger for the postgresql module
-    postgresql_logger = logging_module.setup_logger('postgresql_logger', 'postgresql.log', 'CRITICAL')
+        # Establish connection using sqlalchemy, this will be used to write to PostgreSQL with INSERT statements
+        conn_string = "postgresql://" + params["user"] + ":" + params["password"] + "@" + params["host"] + ":" + \
+                      params["port"] + "/" + params["database"]
+        db = create_engine(conn_string)
+        try:
+            yield lambda first, data: pd.DataFrame(data).to_sql(table, db, if_exists="append", index=False)
+        finally:
+            db.dispose()
+        return
 
-    configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
-    params, dg_params = fetch_config(configfilepath, PGSQL, postgresql_logger)
+    # Connect to PostgreSQL with psycopg2, this will be used to write to PostgreSQL with COPY
+    conn = psycopg2.connect(**params)
+    cur = conn.cursor()
 
-    # Change the log level to the level entered by user
-    if dg_params["loglevel"] is not None:
-        postgresql_logger = logging_module.set_logging_level(postgresql_logger, dg_params["loglevel"])
+    def load_chunk(first, data):
+        pgl.copy_chunk(cur, table, data)
+        conn.commit()
 
-    postgresql_logger.info("Entered PostgreSQL module: Data Generation Process for PostgreSQL has begun.")
+    try:
+        yield load_chunk
+    finally:
+        conn.close()
 
-    # Establish connection using sqlalchemy, this will be used to write to PostgreSQL
-    conn_string = "postgresql://" + params["user"] + ":" + params["password"] + "@" + params["host"] + ":" + params[
-        "port"] + "/" + params["database"]
 
-    db = create_engine(conn_string)
-    sql_conn = db.connect()
+def fetch_columns(cur, schema, table):
+    # Fetches the name, data type, length, precision, scale and nullability of every column in a single query
+    cur.execute("SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, "
+                "is_nullable FROM information_schema.columns WHERE table_schema = %s AND table_name = %s "
+                "ORDER BY ordinal_position;", (schema, table))
+    return [introspection.column(*row) for row in cur.fetchall()]
 
-    try:
-        # Connect to PostgreSQL using parameters fetched from config file, this will be used to read from PostgreSQL
-        conn = psycopg2.connect(**params)
 
-        # Create a cursor
-        cur = conn.cursor()
+def fetch_foreign_keys(cur, schema):
+    # Fetches the (table, column, parent table, parent column) of every foreign key of the schema in a single query
+    cur.execute("SELECT kcu.table_name, kcu.column_name, pk.table_name, pk.column_name "
+                "FROM information_schema.referential_constraints rc "
+                "JOIN information_schema.key_column_usage kcu ON kcu.constraint_schema = rc.constraint_schema "
+                "AND kcu.constraint_name = rc.constraint_name "
+                "JOIN information_schema.key_column_usage pk ON pk.constraint_schema = rc.unique_constraint_schema "
+                "AND pk.constraint_name = rc.unique_constraint_name "
+                "AND pk.ordinal_position = kcu.position_in_unique_constraint "
+                "WHERE kcu.table_schema = %s;", (schema,))
+    return [tuple(introspection.text(value) for value in row) for row in cur.fetchall()]
 
-    except(Exception,):
-        postgresql_logger.critical("An error has occurred while connecting with PostgreSQL: " + traceback.
-                                   format_exc())
-        exit_messages.error_exit()
 
-    # Create/replace the table according to the schema entered by the user if schema is not empty
-    if dg_params["tableschema"] != "":
-        try:
-            # If table exists and table schema is provided by user, drop the existing table
-            cur.execute("DROP TABLE IF EXISTS " + dg_params["table"] + ";")
-            conn.commit()
-            cur.execute(dg_params["tableschema"])
-            conn.commit()
-            postgresql_logger.debug("Creating schema according to config file was successful.")
-        except(Exception,):
-            postgresql_logger.critical("ERROR while creating schema from config file: " + traceback.format_exc())
-            exit_messages.error_exit()
+def add_column(plan, column, table):
+    # Adds the 'postgresqlhelper' function for a column to the plan according to its data type and its name
+    col_name1 = column.name.lower()
+    data_type = column.data_type
 
-    if dg_params["schemaupdate"] == "1":
-        try:
-            cur.execute("TRUNCATE TABLE " + dg_params["table"] + ";")
-            cur.execute(dg_params["schemaupdatequery"])
-            conn.commit()
-            postgresql_logger.debug("Altering schema according to config file was successful.")
-        except(Exception,):
-            postgresql_logger.critical("ERROR while updating existing schema from config file: "+traceback.format_exc())
-            exit_messages.error_exit()
+    if data_type in INTEGER_TYPES and ('id' in col_name1 or 'serial' in col_name1):
+        plan.add(col_name1, column_plan.ID, 1)
 
-    # Fetch the fields from the newly created/replaced table or using the "table" key
-    try:
-        sql = "SELECT column_name FROM information_schema.columns WHERE table_schema = '" + dg_params[
-            "schema"] + "' AND table_name='" + dg_params["table"] + "';"
-        cur.execute(sql)
-        conn.commit()
-        results = [item for t in cur.fetchall() for item in t]
+    elif data_type in NUMERIC_TYPES and ('latitude' in col_name1 or 'longitude' in col_name1):
+        plan.add(col_name1, "latitude" if 'latitude' in col_name1 else "longitude")
 
-    except(Exception,):
-        postgresql_logger.critical("ERROR: " + traceback.format_exc())
-        exit_messages.error_exit()
+    elif data_type in ("bit", "bit varying"):
+        plan.add(col_name1, "bit", column.length or 1)
 
-    if not results:
-        try:
-            raise tableDoesNotExist(dg_params["table"])
-        except tableDoesNotExist as e:
-            postgresql_logger.critical(e.message)
-            exit_messages.error_exit()
+    elif data_type in ("json", "jsonb"):
+        plan.add(col_name1, column_plan.FAKER, "json")
 
-    # Build a SQL for fetching the fixed length of the "bit" data type, if any given
-    postgresql_logger.debug("Fetching the relevant functions from the 'postgresqlhelper' module...")
-    sql = "SELECT character_maximum_length FROM information_schema.columns WHERE table_schema = '" + dg_params[
-        "schema"] + "' AND table_name='" + dg_params["table"] + "' AND column_name='"
-    funcs = {}
+    elif data_type == "numeric":
+        plan.add(col_name1, "numeric", column.precision, column.scale)
 
-    # Fill the "funcs" dictionary with the 'postgresqlhelper' functions according to the field names
-    for _ in range(len(results)):
-        col_name1 = str(results[_]).lower()
-        if 'cidr' in col_name1 or 'inet' in col_name1:
-            funcs[col_name1] = "inet"
+    elif data_type in TYPE_FUNCS:
+        plan.add(col_name1, *TYPE_FUNCS[data_type])
 
-        elif 'latitude' in col_name1:
-            funcs[col_name1] = "latitude"
+    elif data_type in STRING_TYPES:
+        if 'mobile' in col_name1 or 'phone' in col_name1:
+            plan.add(col_name1, "mobile", column.length)
+        elif 'text' in col_name1 or 'string' in col_name1:
+            # Text columns are generated in bulk, see the 'text_engine' module
+            plan.add(col_name1, "text", column.length)
+        else:
+            try:
+                faker_func = pgh.find_faker_func(col_name1, table)
+            except cannotBeEvaluated:
+                faker_func = None
+            if faker_func is None or faker_func in faker_index.LOREM_PROVIDERS:
+                plan.add(col_name1, "text", column.length)
+            else:
+                plan.add(col_name1, column_plan.FAKER, faker_func, column.length)
 
-        elif 'longitude' in col_name1:
-            funcs[col_name1] = "longitude"
+    else:
+        add_column_by_name(plan, column, table)
 
-        elif re.match(r"\w*big_*int\w*", col_name1):
-            funcs[col_name1] = "bigint"
 
-        elif 'int' in col_name1:
-            funcs[col_name1] = "int_value"
+def add_column_by_name(plan, column, table):
+    # Adds the 'postgresqlhelper' function for a column of an unsupported data type according to the column name
+    col_name1 = column.name.lower()
+    if 'cidr' in col_name1 or 'inet' in col_name1:
+        plan.add(col_name1, "inet")
 
-        elif 'bit' in col_name1:
-            sql = sql + col_name1 + "';"
-            cur.execute(sql)
-            conn.commit()
-            max_limit = str([item for t in cur.fetchall() for item in t][0])
-            funcs[col_name1] = "bit("+max_limit+")"
+    elif 'latitude' in col_name1:
+        plan.add(col_name1, "latitude")
 
-        elif 'numeric' in col_name1 or 'decimal' in col_name1 or 'float' in col_name1:
-            funcs[col_name1] = "numeric"
+    elif 'longitude' in col_name1:
+        plan.add(col_name1, "longitude")
 
-        elif 'id' in col_name1 or 'serial' in col_name1:
-            funcs[col_name1] = "id"
+    elif re.match(r"\w*big_*int\w*", col_name1):
+        plan.add(col_name1, "bigint")
 
-        elif re.match(r"\w*time_*stamp_*\w*zone\w*", col_name1):
-            funcs[col_name1] = "timestamp_with_zone"
+    elif 'int' in col_name1:
+        plan.add(col_name1, "int_value")
 
-        elif re.match(r"\w*date_*time\w*", col_name1) or re.match(r"\w*time_*stamp\w*", col_name1):
-            funcs[col_name1] = "timestamp"
+    elif 'bit' in col_name1:
+        plan.add(col_name1, "bit", column.length or 1)
 
-        elif 'time' in col_name1 and 'timestamp' not in col_name1:
-            funcs[col_name1] = "time_value"
+    elif 'numeric' in col_name1 or 'decimal' in col_name1 or 'float' in col_name1:
+        plan.add(col_name1, "numeric")
 
-        elif 'bool' in col_name1:
-            funcs[col_name1] = "boolean_data"
+    elif 'id' in col_name1 or 'serial' in col_name1:
+        plan.add(col_name1, column_plan.ID, 1)
 
-        elif 'string' in col_name1 or 'text' in col_name1:
-            funcs[col_name1] = "text"
+    elif re.match(r"\w*time_*stamp_*\w*zone\w*", col_name1):
+        plan.add(col_name1, "timestamp_with_zone")
 
-        elif 'bytes' in col_name1 or 'bytea' in col_name1:
-            funcs[col_name1] = "bytea_value"
+    elif re.match(r"\w*date_*time\w*", col_name1) or re.match(r"\w*time_*stamp\w*", col_name1):
+        plan.add(col_name1, "timestamp")
 
-        elif 'mobile' in col_name1 or 'phone' in col_name1:
-            funcs[col_name1] = "mobile"
+    elif 'time' in col_name1 and 'timestamp' not in col_name1:
+        plan.add(col_name1, "time_value")
 
-        else:
+    elif 'bool' in col_name1:
+        plan.add(col_name1, "boolean_data")
+
+    elif 'string' in col_name1 or 'text' in col_name1:
+        plan.add(col_name1, "text", column.length)
+
+    elif 'bytes' in col_name1 or 'bytea' in col_name1:
+        plan.add(col_name1, "bytea_value")
+
+    elif 'mobile' in col_name1 or 'phone' in col_name1:
+        plan.add(col_name1, "mobile", column.length)
+
+    else:
+        plan.add(col_name1, column_plan.FAKER, pgh.find_faker_func(col_name1, table), column.length)
+
+
+def main():
+    conn, cur = None, None
+    errors_raised = False
+
+    # Set up a logger for the postgresql module
+    postgresql_logger = logging_module.setup_logger('postgresql_logger', 'postgresql.log', 'CRITICAL')
+
+    configfilepath = os.path.join(ROOT_DIR, 'config', 'config.ini')
+    params, dg_params = fetch_config(configfilepath, PGSQL, postgresql_logger)
+
+    # Change the log level to the level entered by user
+    if dg_params["loglevel"] is not None:
+        postgresql_logger = logging_module.set_logging_level(postgresql_logger, dg_params["loglevel"])
+
+    postgresql_logger.info("Entered PostgreSQL module: Data Generation Process for PostgreSQL has begun.")
+    metrics = Metrics("postgresql", 'postgresql_logger', 'postgresql.log')
+    load_method = dg_params.get("loadmethod", "copy").lower() or "copy"
+    workers = int(dg_params.get("workers") or 1)
+    queue_depth = int(dg_params.get("queuedepth") or 2)
+    load_workers = int(dg_params.get("loadworkers") or 1)
+    seed = int(dg_params.get("seed") or pipeline.new_seed())
+    unique_columns = uniqueness.parse(dg_params.get("uniquecolumns", ""))
+    chunk_size = int(dg_params.get("chunksize") or CHUNK_SIZE)
+
+    # Start a checkpoint file recording the committed chunks, or continue the run of the previous checkpoint file
+    checkpoint = open_checkpoint(checkpoint_path("postgresql", params.get("database", "") + "." + dg_params["schema"]),
+                                 dg_params.get("resume") == "1", seed, chunk_size, postgresql_logger)
+    seed, chunk_size = checkpoint.seed, checkpoint.chunk_size
+    resumed = bool(checkpoint.committed)
+
+    with metrics.phase("connect"):
+        try:
+            # Connect to PostgreSQL using parameters fetched from config file, this will be used to read from PostgreSQL
+            conn = psycopg2.connect(**params)
+
+            # Create a cursor
+            cur = conn.cursor()
+
+        except(Exception,):
+            postgresql_logger.critical("An error has occurred while connecting with PostgreSQL: " + traceback.
+                                       format_exc())
+            exit_messages.error_exit()
+
+    # Create/replace the table according to the schema entered by the user if schema is not empty
+    # A resumed run keeps the table and the rows committed by the previous run
+    with metrics.phase("schema"):
+        if resumed:
+            postgresql_logger.info("The table schema is not created or updated when a run is resumed.")
+        elif dg_params["tableschema"] != "":
+            try:
+                # If table exists and table schema is provided by user, drop the existing table
+                cur.execute("DROP TABLE IF EXISTS " + dg_params["table"] + ";")
+                conn.commit()
+                cur.execute(dg_params["tableschema"])
+                conn.commit()
+                postgresql_logger.debug("Creating schema according to config file was successful.")
+            except(Exception,):
+                postgresql_logger.critical("ERROR while creating schema from config file: " + traceback.format_exc())
+                exit_messages.error_exit()
+
+        if dg_params["schemaupdate"] == "1" and not resumed:
             try:
-                funcs[col_name1] = [pgh.find_faker_func(col_name1)]
-            except cannotBeEvaluated as e:
-                postgresql_logger.error(e.message)
-                errors_raised = True
+                cur.execute("TRUNCATE TABLE " + dg_params["table"] + ";")
+                cur.execute(dg_params["schemaupdatequery"])
+                conn.commit()
+                postgresql_logger.debug("Altering schema according to config file was successful.")
+            except(Exception,):
+                postgresql_logger.critical("ERROR while updating existing schema from config file: " +
+                                           traceback.format_exc())
+                exit_messages.error_exit()
+
+    # Fetch the columns of every table from the newly created/replaced table or using the "table" or "tables" keys,
+    # or from the local cache, and the foreign keys of the schema
+    tables = [table.strip() for table in (dg_params.get("tables") or dg_params["table"]).split(",") if table.strip()]
+    counts = scheduler.parse_counts(dg_params.get("recordcounts", ""), int(dg_params["recordcount"]))
+    schema_changed = dg_params["tableschema"] != "" or dg_params["schemaupdate"] == "1"
+    table_columns = {}
+    with metrics.phase("introspection"):
+        for table in tables:
+            table_name = dg_params["schema"] + "." + table
+            columns = None
+            if dg_params.get("schemacache") == "1" and not schema_changed:
+                columns = introspection.load("postgresql", table_name)
+
+            if columns is None:
+                try:
+                    columns = fetch_columns(cur, dg_params["schema"], table)
+                    conn.commit()
+                except(Exception,):
+                    postgresql_logger.critical("ERROR: " + traceback.format_exc())
+                    exit_messages.error_exit()
+                if columns:
+                    introspection.store("postgresql", table_name, columns)
+
+            if not columns:
+                try:
+                    raise tableDoesNotExist(table)
+                except tableDoesNotExist as e:
+                    postgresql_logger.critical(e.message)
+                    exit_messages.error_exit()
+            table_columns[table] = columns
 
-    # Generate rows for target table by evaluating the 'postgresqlhelper' functions
-    postgresql_logger.debug("Evaluating 'postgresqlhelper' functions to generate data...")
-    rows = []
-    for i in range(int(dg_params["recordcount"])):
-        data = {}
-        for j in funcs.keys():
-            if funcs[j] == "id":
-                data[j] = i+1
-            elif isinstance(funcs[j], list):
-                data[j] = pgh.fake_data(funcs[j][0])
-            elif "bit" in funcs[j]:
-                data[j] = eval("pgh."+funcs[j])
-            else:
-                data[j] = eval("pgh." + funcs[j] + "()")
-            rows_to_insert = data
-        rows.append(rows_to_insert)
+        try:
+            foreign_keys = fetch_foreign_keys(cur, dg_params["schema"])
+            conn.commit()
+        except(Exception,):
+            postgresql_logger.critical("ERROR: " + traceback.format_exc())
+            exit_messages.error_exit()
 
-    postgresql_logger.debug("Data generation complete!")
+    postgresql_logger.debug("Fetching the relevant functions from the 'postgresqlhelper' module...")
+    parents = scheduler.dependencies(tables, foreign_keys)
+    plans = {}
 
-    # Load the DataFrame to the PostgreSQL table
+    # Compile the 'postgresqlhelper' functions for every column into the plan of every table according to the column
+    # types, parents first so that foreign key columns are sampled from the keys generated for their parents
+    with metrics.phase("resolution"):
+        try:
+            order = scheduler.topological_order(parents)
+        except ValueError as e:
+            postgresql_logger.critical(str(e))
+            exit_messages.error_exit()
+
+        for table in order:
+            plan = column_plan.ColumnPlan(pgh, pool_size=int(dg_params.get("fakerpoolsize") or 0),
+                                          pool_refresh=int(dg_params.get("fakerpoolrefresh") or 0),
+                                          unique=uniqueness.limits(table_columns[table], unique_columns, table))
+            for column in table_columns[table]:
+                try:
+                    uniqueness.check(column, unique_columns, table, counts(table))
+                    if not scheduler.add_reference(plan, column.name.lower(), table, foreign_keys, plans, counts):
+                        add_column(plan, column, dg_params["schema"] + "." + table)
+                except cannotBeEvaluated as e:
+                    postgresql_logger.error(e.message)
+                    errors_raised = True
+            plans[table] = plan
+
+        faker_index.save()
+
+    # Generate the columns of every table in chunks using the compiled plans and load every chunk
+    postgresql_logger.debug("Evaluating 'postgresqlhelper' functions to generate data...")
+    postgresql_logger.info("Generating data for " + str(len(tables)) + " table(s) with " + str(workers) +
+                           " worker(s) and seed " + str(seed) + ".")
+    for table in tables:
+        if checkpoint.rows(table):
+            postgresql_logger.info(str(checkpoint.rows(table)) + " rows of " + table + " were committed by the "
+                                   "previous run and are skipped.")
+    jobs = {table: (plans[table], counts(table), chunk_size, partial(open_loader, params, table, load_method),
+                    not scheduler.references_itself(table, foreign_keys)) for table in tables}
     try:
-        rows_to_insert = pd.DataFrame(rows)
-        rows_to_insert.to_sql(dg_params["table"], sql_conn, if_exists="append", index=False)
+        with metrics.phase("pipeline"):
+            scheduler.run(jobs, parents, workers, seed, metrics, queue_depth, load_workers, checkpoint)
     except(Exception,):
         postgresql_logger.error("There was an error while loading data to PostgreSQL: " + traceback.
                                 format_exc())
+        postgresql_logger.error("Set Resume=1 to continue the run from the checkpoint file " + checkpoint.path + ".")
         exit_messages.error_exit()
+    checkpoint.remove()
+
+    postgresql_logger.debug("Data generation complete!")
+    metrics.write()
 
     if conn is not None:
         conn.close()
@@ -5,45 +5,82 @@ For more information, see the section on PostgreSQL in README.md
 
 """
 import random as r
-import base64
+import numpy as np
 import pytz
-from faker import Faker
-from datetime import time
 from config.definitions import INT_RANGE, PG_INT_RANGE, LOCALE, TZ_INFO
+from modules import binary, faker_index, temporal, text_engine
+from modules.faker_context import fake
 from modules.data_generation_exceptions import cannotBeEvaluated
 
-fake = Faker(locale=LOCALE)
-Faker.seed()
+rng = np.random.default_rng()
+# The timezone of timestamptz values, built once as building it is slow
+TZ = pytz.timezone(TZ_INFO)
 
 
-def bigint():
-    return int(r.uniform(-INT_RANGE, INT_RANGE))
+def seed(value):
+    # Seeds the shared Faker instance and the random generators used by this module
+    global rng
+    fake.seed_instance(value)
+    r.seed(value)
+    rng = np.random.default_rng(value)
 
 
-def bit(digit):
-    res = bin(r.getrandbits(digit))[2:].zfill(digit)
-    return res
+# The numeric functions below return a single value when called without a row count and a whole column
+# (a NumPy array of n values) when called with one, e.g. int_value(1000) or bit(8, 1000)
+
+
+def bigint(n=None):
+    if n is None:
+        return int(r.uniform(-INT_RANGE, INT_RANGE))
+    return rng.integers(-INT_RANGE, INT_RANGE, n, dtype=np.int64)
+
+
+def bit(digit, n=None):
+    if n is None:
+        res = bin(r.getrandbits(digit))[2:].zfill(digit)
+        return res
+    # Build an (n, digit) matrix of ASCII '0'/'1' bytes and view every row as one fixed width string
+    bits = rng.integers(0, 2, (n, digit), dtype=np.uint8) + ord('0')
+    return bits.view("S" + str(digit)).ravel().astype(str)
 
 
 def boolean_data():
     return r.choice([True, False])
 
 
-def bytea_value():
-    byte_ch = base64.b64encode(bytes(str(eval("fake.binary(length=16)")), 'utf-8'))
-    return byte_ch
+def bytea_value(n=None):
+    # Random bytea values, see the 'binary' module
+    if n is None:
+        return binary.values(rng, 1).to_bytes()[0]
+    return binary.values(rng, n)
 
 
 def inet():
     return r.choice([fake.ipv4(), fake.ipv6()])
 
 
-def int_value():
-    return int(r.uniform(-PG_INT_RANGE, PG_INT_RANGE))
+def int_range(low, high, n=None):
+    # Returns integers from low (inclusive) to high (exclusive), e.g. for smallint columns
+    if n is None:
+        return r.randrange(low, high)
+    return rng.integers(low, high, n, dtype=np.int64)
 
 
-def numeric():
-    return float(r.random())
+def int_value(n=None):
+    if n is None:
+        return int(r.uniform(-PG_INT_RANGE, PG_INT_RANGE))
+    return rng.integers(-PG_INT_RANGE, PG_INT_RANGE, n, dtype=np.int64)
+
+
+def numeric(precision=None, scale=None, n=None):
+    # Values of DECIMAL(precision, scale) columns, or values from 0 to 1 if the precision is not declared
+    if precision is None:
+        return float(r.random()) if n is None else rng.random(n)
+    bound = 10 ** (precision - (scale or 0))
+    values = rng.uniform(-bound, bound, 1 if n is None else n)
+    # Values are cut to scale decimals toward zero, so that no value is rounded up to the bound
+    values = np.trunc(values * 10 ** (scale or 0)) / 10 ** (scale or 0)
+    return float(values[0]) if n is None else values
 
 
 def numeric_value():
@@ -58,34 +95,53 @@ def longitude():
     return float(fake.longitude())
 
 
-def text():
-    return fake.text()
+def text(max_chars=None, n=None):
+    # Sentences of up to max_chars characters, see the 'text_engine' module
+    if n is None:
+        return text_engine.sentences(rng, 1, max_chars)[0]
+    return text_engine.sentences(rng, n, max_chars)
+
+
+def time_value(n=None):
+    # Times of day, see the 'temporal' module
+    if n is None:
+        return temporal.times(rng, 1)[0]
+    return temporal.times(rng, n)
 
 
-def time_value():
-    values = list(map(int, fake.time().split(":")))
-    return time(values[0], values[1], values[2])
+def date_value(n=None):
+    # Dates in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.dates(rng, 1).tolist()[0]
+    return temporal.dates(rng, n)
 
 
-def timestamp():
-    return fake.date_time()
+def timestamp(n=None):
+    # Timestamps without timezone in DATE_RANGE, see the 'temporal' module
+    if n is None:
+        return temporal.datetimes(rng, 1).tolist()[0]
+    return temporal.datetimes(rng, n)
 
 
-def timestamp_with_zone():
-    tz = pytz.timezone(TZ_INFO)
-    return tz.localize(fake.date_time())
+def timestamp_with_zone(n=None):
+    # Timestamps in DATE_RANGE in the timezone TZ_INFO, see the 'temporal' module
+    if n is None:
+        return temporal.aware_datetimes(rng, 1, TZ)[0]
+    return temporal.aware_datetimes(rng, n, TZ)
 
 
-def mobile():
-    return fake.phone_number()
+def mobile(max_length=None):
+    # Phone numbers are cut to the maximum length of their column, e.g. for numbers with a country code
+    return fake.phone_number()[:max_length]
 
 
-def find_faker_func(col_name):
-    for elem in dir(fake):
-        if elem in col_name:
-            return elem
+def find_faker_func(col_name, table=None):
+    # Returns the longest Faker function name contained in the column name, see the 'faker_index' module
+    elem = faker_index.find(fake, LOCALE, col_name, table)
+    if elem is not None:
+        return elem
     raise cannotBeEvaluated(col_name)
 
 
 def fake_data(elem):
-    return None if elem is None else str(eval("fake." + elem + "()"))
+    return None if elem is None else str(getattr(fake, elem)())
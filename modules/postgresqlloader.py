@@ -0,0 +1,62 @@
+"""
+This module loads generated data into PostgreSQL tables using COPY FROM STDIN.
+It is used in conjunction with the 'postgresql' module.
+For more information, see the section on PostgreSQL in README.md
+
+"""
+import io
+from datetime import date, time
+
+import numpy as np
+
+from modules.binary import BinaryColumn
+
+NULL = "\\N"
+# Characters that have to be escaped with a backslash in the text format of COPY
+ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def encode_value(value):
+    # Returns a single value in the text format of COPY
+    if value is None:
+        return NULL
+    if isinstance(value, (bool, np.bool_)):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea uses the hex format, its leading backslash has to be escaped as well
+        return "\\\\x" + bytes(value).hex()
+    if isinstance(value, (date, time)):
+        # Covers date, time, timestamp and timestamptz, tz-aware values keep their UTC offset
+        return value.isoformat()
+    return str(value).translate(ESCAPES)
+
+
+def encode_column(values):
+    # Returns all the values of a column in the text format of COPY
+    if isinstance(values, BinaryColumn):
+        # bytea uses the hex format, the whole buffer of the column is converted at once
+        return values.hex("\\\\x")
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "b":
+            return np.where(values, "t", "f").tolist()
+        if values.dtype.kind in "iuf":
+            return values.astype(str).tolist()
+        if values.dtype.kind == "U":
+            # bit(n) strings only ever contain 0 and 1
+            return values.tolist()
+        if values.dtype.kind == "M":
+            # Dates and timestamps without timezone, as generated by the 'temporal' module
+            return np.char.replace(np.datetime_as_string(values), "T", " ").tolist()
+        values = values.tolist()
+    return [encode_value(value) for value in values]
+
+
+def copy_chunk(cur, table, data):
+    # Streams a dictionary of generated columns into the table with a single COPY FROM STDIN command
+    columns = [encode_column(values) for values in data.values()]
+    buffer = io.StringIO()
+    buffer.writelines("\t".join(row) + "\n" for row in zip(*columns))
+    buffer.seek(0)
+
+    column_list = ", ".join('"' + column + '"' for column in data.keys())
+    cur.copy_expert("COPY " + table + " (" + column_list + ") FROM STDIN", buffer)
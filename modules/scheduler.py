@@ -0,0 +1,144 @@
+"""
+This module generates the tables of a schema in the order of their foreign keys.
+A table is only started once all the tables it references are loaded, and tables that do not depend on each other
+are generated at the same time. Foreign key columns are sampled from the key ranges of their parent tables, which
+are known from the plans of the parents, so no values are read back from the database.
+It is used in conjunction with the 'pipeline', 'mysql_dg' and 'postgresql' modules.
+
+"""
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from modules import column_plan, pipeline
+
+
+def parse_counts(value, default):
+    # Parses a list of row counts such as "orders:50000, customers:1000", tables that are not listed use the default
+    counts = {}
+    for item in value.split(","):
+        if item.strip():
+            table, _, count = item.partition(":")
+            counts[table.strip()] = int(count)
+    return lambda table: counts.get(table, default)
+
+
+def dependencies(tables, foreign_keys):
+    # Returns the tables referenced by every table, foreign keys are (table, column, parent table, parent column)
+    # References to tables that are not generated by the run and references of a table to itself are left out
+    parents = {table: set() for table in tables}
+    for table, _, parent, _ in foreign_keys:
+        if table in parents and parent in parents and parent != table:
+            parents[table].add(parent)
+    return parents
+
+
+def topological_order(parents):
+    # Returns the tables with every table after the tables it references, in the given order otherwise
+    order, done, remaining = [], set(), dict(parents)
+    while remaining:
+        ready = [table for table, table_parents in remaining.items() if table_parents <= done]
+        if not ready:
+            raise ValueError("The foreign keys of these tables form a cycle: " + ", ".join(sorted(remaining)))
+        for table in ready:
+            order.append(table)
+            done.add(table)
+            del remaining[table]
+    return order
+
+
+def key_range(plan, column, n_record):
+    # Returns the range of the keys generated for a column by a plan of n_record rows, or None if it is not a key
+    for name, generator, args in plan.spec:
+        if name.lower() == column.lower() and generator == column_plan.ID:
+            return args[0], args[0] + n_record
+    return None
+
+
+def add_reference(plan, column, table, foreign_keys, plans, counts):
+    """
+    Adds a foreign key column sampled from the keys of its parent table to the plan and returns True, or returns
+    False if the column is not a foreign key to a table of the run or if the keys of the parent are not generated.
+    For a table referencing itself, the keys are sampled from the rows up to the current row.
+    """
+    for child, child_column, parent, parent_column in foreign_keys:
+        if child != table or child_column.lower() != column.lower() or (parent != table and parent not in plans):
+            continue
+        keys = key_range(plan if parent == table else plans[parent], parent_column, counts(parent))
+        if keys is None:
+            return False
+        plan.add(column, column_plan.REF, keys[0], None if parent == table else keys[1])
+        return True
+    return False
+
+
+def references_itself(table, foreign_keys):
+    # Tables referencing themselves are generated in a single shard, so that every row references a loaded row
+    return any(child == table and parent == table for child, _, parent, _ in foreign_keys)
+
+
+def run(jobs, parents, workers=1, seed=None, metrics=None, queue_depth=0, load_workers=1, checkpoint=None):
+    """
+    Generates and loads every table of jobs, a dictionary of table names and (plan, n_record, chunk_size, loader,
+    splittable) tuples, after the tables it references. 'loader' is used as in the 'pipeline' module. The tables of
+    a run share up to 'workers' worker processes, every table is split in shards unless it is not splittable (e.g.
+    if it references itself). 'queue_depth' and 'load_workers' are used as in the 'pipeline' module, but tables that
+    are not splittable are loaded by a single thread so that their chunks are committed in order. If a checkpoint is
+    given, the loaded chunks of every table are recorded in it and the chunks it holds are skipped. Returns the
+    number of rows of every table.
+    """
+    seed = pipeline.new_seed() if seed is None else seed
+    order = topological_order(parents)
+    # Every table needs its own random state, otherwise tables with the same columns would get the same values
+    table_seeds = {table: pipeline.shard_seed(seed, index) for index, table in enumerate(order)}
+    table_checkpoints = {table: None if checkpoint is None else checkpoint.of(table) for table in order}
+
+    if workers <= 1:
+        loaded = {}
+        for table in order:
+            plan, n_record, chunk_size, loader, splittable = jobs[table]
+            loaded[table] = pipeline.run(plan, n_record, chunk_size, loader, 1, table_seeds[table], metrics,
+                                         queue_depth, load_workers if splittable else 1, table_checkpoints[table])
+        return loaded
+
+    loaded, shards_left, futures, done = {}, {}, {}, set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        def submit_ready():
+            # Starts the tables whose parents are loaded, returns True if a table without rows was completed
+            completed = False
+            for table in order:
+                if table in loaded or not parents[table] <= done:
+                    continue
+                plan, n_record, chunk_size, loader, splittable = jobs[table]
+                loaded[table] = 0
+                # A table that is not splittable is also loaded by a single thread, so that its chunks are
+                # committed in order and every row only references rows of committed chunks
+                table_workers, table_load_workers = (workers, load_workers) if splittable else (1, 1)
+                table_shards = [(first, count) for first, count in pipeline.shards(n_record, table_workers, chunk_size)
+                                if count]
+                shards_left[table] = len(table_shards)
+                if not table_shards:
+                    done.add(table)
+                    completed = True
+                for first, count in table_shards:
+                    future = executor.submit(pipeline.run_shard, plan, first, count, chunk_size, loader,
+                                             table_seeds[table], None if metrics is None else metrics.fork(),
+                                             queue_depth, table_load_workers, table_checkpoints[table])
+                    futures[future] = table
+            return completed
+
+        while len(done) < len(order):
+            while submit_ready():
+                pass
+            if not futures:
+                break
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                table = futures.pop(future)
+                count, shard_metrics = future.result()
+                loaded[table] += count
+                if metrics is not None:
+                    metrics.merge(shard_metrics)
+                shards_left[table] -= 1
+                if not shards_left[table]:
+                    done.add(table)
+    return loaded
@@ -0,0 +1,49 @@
+"""
+This module generates whole columns of dates, times and timestamps in bulk instead of calling Faker for every value.
+Timestamps are sampled as int64 offsets in seconds within DATE_RANGE (see config/definitions.py) and returned as
+NumPy datetime64 arrays, which the loaders encode without converting every value.
+It is used in conjunction with the 'bigqueryhelper', 'mysqlhelper' and 'postgresqlhelper' modules.
+
+"""
+from datetime import datetime, time
+
+import numpy as np
+
+from config.definitions import DATE_RANGE
+
+
+def epoch_range():
+    # Returns the first and last second of DATE_RANGE since the epoch
+    start, end = (np.datetime64(bound, "s").astype(np.int64) for bound in DATE_RANGE)
+    return int(start), int(end)
+
+
+# The bounds are computed once, every column of every chunk is sampled in the same range
+EPOCH_RANGE = epoch_range()
+
+
+def seconds(rng, n):
+    # Returns n int64 offsets in seconds since the epoch within DATE_RANGE
+    start, end = EPOCH_RANGE
+    return rng.integers(start, end + 1, n, dtype=np.int64)
+
+
+def datetimes(rng, n):
+    # Returns n timestamps without timezone as a datetime64 array of seconds
+    return seconds(rng, n).astype("datetime64[s]")
+
+
+def dates(rng, n):
+    return datetimes(rng, n).astype("datetime64[D]")
+
+
+def times(rng, n):
+    # Returns n times of day, as there is no NumPy type for times of day they are Python time values
+    minutes, second = np.divmod(rng.integers(0, 24 * 60 * 60, n), 60)
+    hours, minutes = np.divmod(minutes, 60)
+    return list(map(time, hours.tolist(), minutes.tolist(), second.tolist()))
+
+
+def aware_datetimes(rng, n, tz):
+    # Returns n timestamps with timezone as Python datetime values in the timezone tz
+    return [datetime.fromtimestamp(second, tz) for second in seconds(rng, n).tolist()]
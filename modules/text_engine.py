@@ -0,0 +1,57 @@
+"""
+This module generates whole columns of text in bulk instead of calling Faker's text() for every value.
+The word list of the Faker locale is loaded once into arrays, and the words, sentence ends and length of every value
+are sampled for all the rows of a chunk at once. Values never exceed the maximum length of their column.
+It is used in conjunction with the 'bigqueryhelper', 'mysqlhelper' and 'postgresqlhelper' modules.
+
+"""
+import numpy as np
+
+from modules.faker_context import fake
+
+# The maximum length of generated text, as for Faker's text(), used for columns without a shorter maximum length
+MAX_CHARS = 200
+# The probability of a word to end a sentence, so that sentences have 7 words on average
+SENTENCE_END = 1 / 7
+
+_words = None
+
+
+def words():
+    """
+    Returns the words of the Faker locale in four forms, as a (4, number of words) array: lowercase, lowercase
+    ending a sentence, capitalized and capitalized ending a sentence, and the length of every word in each form.
+    The words are loaded on first use, so that importing the helper modules stays fast.
+    """
+    global _words
+    if _words is None:
+        word_list = fake.get_words_list()
+        forms = [word_list, [word + "." for word in word_list], [word.capitalize() for word in word_list],
+                 [word.capitalize() + "." for word in word_list]]
+        table = np.array(forms, dtype=object)
+        _words = table, np.vectorize(len, otypes=[np.int64])(table)
+    return _words
+
+
+def sentences(rng, n, max_chars=None):
+    # Returns n values of sentences of up to max_chars characters (MAX_CHARS if max_chars is not set or longer)
+    max_chars = min(max_chars or MAX_CHARS, MAX_CHARS)
+    table, lengths = words()
+    # Enough words for the longest values, the words that do not fit the length of a value are dropped
+    per_value = max_chars // (int(lengths[0].mean()) + 1) * 2 + 1
+    picked = rng.integers(0, table.shape[1], (n, per_value))
+    ends = rng.random((n, per_value)) < SENTENCE_END
+    starts = np.ones_like(ends)
+    starts[:, 1:] = ends[:, :-1]
+    forms = starts * 2 + ends
+
+    # Every word takes its length and a separating space, the space of the last word is replaced with a period
+    used = np.cumsum(lengths[forms, picked] + 1, axis=1)
+    targets = rng.integers(max(max_chars // 2, 1), max_chars + 1, n)
+    kept = used <= targets[:, None]
+    counts = kept.sum(axis=1)
+    forms[np.arange(n), np.maximum(counts - 1, 0)] |= 1
+
+    # If not even one word fits a value, the first word is cut to the maximum length
+    return [" ".join(tokens[:count]) if count else tokens[0][:max_chars]
+            for tokens, count in zip(table[forms, picked].tolist(), counts.tolist())]
@@ -0,0 +1,98 @@
+"""
+This module makes the values of the columns listed in UniqueColumns distinct without keeping the generated values.
+Values are made unique from the global index of their row, which is different for every row of a table whatever
+the chunk or the worker process generating it: integer columns get a bijective mix of the row index in the range of
+their data type, and text values get the row index as a suffix (before the '@' of email addresses).
+It is used in conjunction with the 'column_plan' module.
+For more information, see the section on Configuration in README.md
+
+"""
+import numpy as np
+
+from modules.data_generation_exceptions import cannotBeUnique
+
+# The number of bits of the integer data types of all backends
+INTEGER_BITS = {
+    "tinyint": 8,
+    "smallint": 16,
+    "mediumint": 24,
+    "int": 32,
+    "integer": 32,
+    "bigint": 64,
+    "int64": 64,
+    "smallserial": 16,
+    "serial": 32,
+    "bigserial": 64,
+}
+# The text data types of all backends, their values are made unique with a suffix
+STRING_TYPES = ("string", "char", "varchar", "tinytext", "text", "mediumtext", "longtext", "character",
+                "character varying")
+# Odd multipliers of the mix, every multiplication by an odd number is a bijection modulo 2 ** bits
+MULTIPLIERS = (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9)
+
+
+def parse(value):
+    # Parses a list of columns such as "email, users.username", columns without a table are unique in every table
+    return [name.strip().lower() for name in value.split(",") if name.strip()]
+
+
+def listed(column, names, table):
+    name = column.name.lower()
+    return name in names or table.lower() + "." + name in names
+
+
+def limits(columns, names, table):
+    # Returns the (maximum length, bits) of the columns of a table listed in names, bits is None for text columns
+    return {column.name.lower(): (column.length, INTEGER_BITS.get(column.data_type)) for column in columns
+            if listed(column, names, table)}
+
+
+def check(column, names, table, n_record):
+    # Raises cannotBeUnique if the column is listed in names but its values cannot all be distinct in n_record rows
+    if not listed(column, names, table):
+        return
+    bits = INTEGER_BITS.get(column.data_type)
+    if bits:
+        if n_record > 2 ** bits:
+            raise cannotBeUnique(column.name, "its data type only has " + str(2 ** bits) + " values for " +
+                                 str(n_record) + " rows")
+    elif column.data_type not in STRING_TYPES:
+        raise cannotBeUnique(column.name, "only integer and text columns are supported")
+    elif column.length and len(suffix(max(n_record - 1, 0))) > column.length:
+        raise cannotBeUnique(column.name, "the row index suffix of " + str(n_record) + " rows does not fit its "
+                             "maximum length of " + str(column.length))
+
+
+def suffix(row):
+    return "_" + str(row)
+
+
+def integers(start, n, bits):
+    # Returns the distinct integers of the rows start to start + n - 1 in the signed range of the bits
+    mask = np.uint64((1 << bits) - 1)
+    shift = np.uint64(bits // 2)
+    values = np.arange(start, start + n, dtype=np.uint64) & mask
+    # Multiplications by odd numbers and right xorshifts are invertible, so distinct rows keep distinct values
+    with np.errstate(over="ignore"):
+        for multiplier in MULTIPLIERS:
+            values = (values * np.uint64(multiplier)) & mask
+            values ^= values >> shift
+        return (values - np.uint64(1 << (bits - 1))).astype(np.int64)
+
+
+def strings(values, start, max_length=None):
+    # Adds the row index to every text value, cutting the value so that it fits max_length with its suffix
+    unique = []
+    for row, value in enumerate(values, start):
+        if not isinstance(value, str):
+            unique.append(value)
+            continue
+        local, at, domain = value.rpartition("@")
+        base, row_suffix, tail = (local, "." + str(row), at + domain) if at else (value, suffix(row), "")
+        if max_length and len(row_suffix) + len(tail) > max_length:
+            # The domain is dropped if it does not fit, check() makes sure that the suffix alone fits
+            base, row_suffix, tail = local, suffix(row), ""
+        if max_length:
+            base = base[:max_length - len(row_suffix)]
+        unique.append(base + row_suffix + tail)
+    return unique
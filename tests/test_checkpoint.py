@@ -0,0 +1,29 @@
+import logging
+
+from modules.checkpoint import open_checkpoint
+
+logger = logging.getLogger("test_checkpoint")
+
+
+def test_fresh_run_is_not_resumed(tmp_path):
+    path = str(tmp_path / "bigquery_table.jsonl")
+    checkpoint = open_checkpoint(path, False, 7, 100, logger).of("table")
+    assert checkpoint.rows("table") == 0
+    assert not checkpoint.is_committed(0, 100)
+
+
+def test_resume_without_checkpoint_file_is_not_resumed(tmp_path):
+    path = str(tmp_path / "bigquery_table.jsonl")
+    checkpoint = open_checkpoint(path, True, 7, 100, logger).of("table")
+    assert checkpoint.rows("table") == 0
+
+
+def test_resumed_run_skips_committed_chunks(tmp_path):
+    path = str(tmp_path / "bigquery_table.jsonl")
+    open_checkpoint(path, False, 7, 100, logger).of("table").record(0, 100)
+
+    checkpoint = open_checkpoint(path, True, 8, 50, logger).of("table")
+    assert (checkpoint.seed, checkpoint.chunk_size) == (7, 100)
+    assert checkpoint.rows("table") == 100
+    assert checkpoint.is_committed(0, 100)
+    assert not checkpoint.is_committed(100, 100)
@@ -0,0 +1,15 @@
+from config.definitions import LOCALE
+from modules import faker_index
+from modules.faker_context import fake
+
+
+def test_zip_code_resolves_to_a_postcode():
+    match = faker_index.longest_match(faker_index.get_index(fake, LOCALE), "zip_code")
+    assert match is not None and "code" in match
+    assert isinstance(getattr(fake, match)(), str)
+
+
+def test_archive_and_binary_providers_are_not_indexed():
+    names = faker_index.provider_names(fake)
+    assert not set(names) & {"zip", "tar", "binary", "xml", "image"}
+    assert "postcode" in names and "email" in names
@@ -0,0 +1,16 @@
+import numpy as np
+
+from modules import bigquerycolumns, bigqueryhelper, column_plan, introspection
+
+
+def test_numeric_values_fit_precision_and_scale():
+    values = bigqueryhelper.numeric(10, 2, n=10000)
+    assert (np.abs(values) < 10 ** 8).all()
+    assert np.allclose(values * 100, np.round(values * 100))
+
+
+def test_declared_precision_and_scale_are_passed_to_the_helper():
+    plan = column_plan.ColumnPlan(bigqueryhelper)
+    bigquerycolumns.add_column(plan, introspection.parse_type("price", "NUMERIC(10,2)"), "files.products")
+    assert plan.spec == [("price", "numeric", (10, 2))]
+    assert (np.abs(plan.generate(0, 1000)["price"]) < 10 ** 8).all()
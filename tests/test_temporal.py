@@ -0,0 +1,15 @@
+import numpy as np
+
+from modules import temporal
+
+
+def test_same_seed_generates_the_same_timestamps():
+    first = temporal.datetimes(np.random.default_rng(7), 1000)
+    second = temporal.datetimes(np.random.default_rng(7), 1000)
+    assert (first == second).all()
+
+
+def test_timestamps_are_within_date_range():
+    start, end = (np.datetime64(bound, "s") for bound in temporal.DATE_RANGE)
+    values = temporal.datetimes(np.random.default_rng(7), 1000)
+    assert (values >= start).all() and (values <= end).all()